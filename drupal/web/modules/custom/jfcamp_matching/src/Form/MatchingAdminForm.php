@@ -125,7 +125,8 @@ public function submitForm(array &$form, FormStateInterface $form_state): void {
   public function submitDryRun(array &$form, FormStateInterface $form_state): void {
     $this->submitForm($form, $form_state);
     try {
-      $res = $this->client->dryRun();
+      // Vorschau darf das vorberechnete Ergebnis nutzen (falls PREMATCH_ENABLED); der Echtlauf rechnet immer live.
+      $res = $this->client->dryRun(['prematch' => TRUE]);
       $sum = $res['summary'] ?? [];
       $this->messenger()->addStatus($this->formatSummary('Dry‑Run OK', $sum));
     }
@@ -66,7 +66,8 @@ private function post(string $path, array $payload = []): array {
     try {
       $res = $this->http->request('POST', $url, [
         'timeout' => 120,
-        'headers' => ['Accept' => 'application/json', 'Content-Type' => 'application/json'],
+        // gzip aushandeln: Dry-Run-Antworten sind bei vielen Teilnehmenden mehrere MB groß.
+        'headers' => ['Accept' => 'application/json', 'Content-Type' => 'application/json', 'Accept-Encoding' => 'gzip'],
         'json' => empty($payload) ? new \stdClass() : $payload,
       ]);
       $data = json_decode((string) $res->getBody(), true);
@@ -0,0 +1,55 @@
+import http from 'k6/http'
+import { check, sleep } from 'k6'
+import { Trend, Rate } from 'k6/metrics'
+
+// Operator-Mix gegen den Matching-Service: GET /matching/stats und POST /matching/dry-run.
+// Gleiche Kennzahlen wie k6-wunsch-simple.js (latency_200_ms, status_*), damit
+// scripts/capacity_summarize.sh die Läufe im selben Format auswertet.
+const BASE = __ENV.BASE_URL || 'http://127.0.0.1:5001'
+const STATS_RATIO = parseFloat(__ENV.STATS_RATIO || '0.7')       // Anteil stats, Rest dry-run
+const REFRESH_RATIO = parseFloat(__ENV.REFRESH_RATIO || '0')     // Anteil mit refresh=1 (Snapshot-Cache umgehen)
+const CONFIG_IDS = (__ENV.CONFIG_IDS || '1,2').split(',').map(s => s.trim()).filter(Boolean)
+const THINK_S = parseFloat(__ENV.THINK_S || '1')
+
+// Trends/Rates
+const t_total = new Trend('latency_total_ms')
+const t_ok    = new Trend('latency_200_ms')
+const t_stats = new Trend('latency_stats_200_ms')
+const t_dry   = new Trend('latency_dryrun_200_ms')
+const r_200   = new Rate('status_200')
+const r_429   = new Rate('status_429')
+const r_5xx   = new Rate('status_5xx')
+const okOrThrottled = new Rate('ok_or_throttled')
+
+export default function () {
+  const cid = CONFIG_IDS[(__VU + __ITER) % CONFIG_IDS.length]
+  const refresh = Math.random() < REFRESH_RATIO
+  const isStats = Math.random() < STATS_RATIO
+  let res
+  if (isStats) {
+    res = http.get(`${BASE}/matching/stats?config=${encodeURIComponent(cid)}${refresh ? '&refresh=1' : ''}`, {
+      tags: { endpoint: 'stats' },
+      timeout: '120s',
+    })
+  } else {
+    res = http.post(`${BASE}/matching/dry-run`, JSON.stringify({ config_id: cid, format: 'columnar', refresh }), {
+      headers: { 'Content-Type': 'application/json', 'Accept-Encoding': 'gzip' },
+      tags: { endpoint: 'dry-run' },
+      timeout: '120s',
+    })
+  }
+
+  t_total.add(res.timings.duration)
+  if (res.status === 200) {
+    t_ok.add(res.timings.duration)
+    ;(isStats ? t_stats : t_dry).add(res.timings.duration)
+  }
+
+  r_200.add(res.status === 200)
+  r_429.add(res.status === 429)
+  r_5xx.add(res.status >= 500 && res.status <= 599)
+  okOrThrottled.add(res.status === 200 || res.status === 429)
+
+  check(res, { 'ok or throttled': (r) => r.status === 200 || r.status === 429 })
+  sleep(THINK_S)
+}
@@ -20,19 +20,47 @@ Ad-hoc Overrides (pro Request-Body bei /matching/dry-run):
   weights_base (geometric: default 0.8), linear_min (linear: default 0.2)
 """
 
+import cProfile
+import email.utils
+import gzip
+import hashlib
+import heapq
+import json
 import os
+import pickle
+import pstats
+import queue
 import random
+import secrets
+import stat
+import threading
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
-from collections import defaultdict, Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+from collections import defaultdict, deque, Counter, OrderedDict
 from urllib.parse import urlparse, urljoin, urlunparse, parse_qs
 
 import requests
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, send_from_directory
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover – ohne flock (Windows) rechnet jeder Prozess selbst
+    fcntl = None
+
+# Optional: schneller JSON-Encoder und Brotli (Fallback: stdlib json / nur gzip)
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
 # --------------------------------------------------------------------------------------
 # Konfiguration & Defaults
 # --------------------------------------------------------------------------------------
@@ -42,6 +70,41 @@ PAGE_CHUNK = int(os.getenv("PAGE_CHUNK", "100"))
 PUBLISHED_ONLY = os.getenv("PUBLISHED_ONLY", "1") not in ("0", "false", "False")
 DEFAULT_SEED = os.getenv("MATCHING_SEED", "")
 MAX_PAGES = int(os.getenv("MAX_PAGES") or os.getenv("MAX_PAGE_LIMIT", "1000"))
+PAGE_ADAPTIVE = os.getenv("PAGE_ADAPTIVE", "1") not in ("0", "false", "False")
+PAGE_MIN = max(1, int(os.getenv("PAGE_MIN", "10")))
+PAGE_TARGET_MS = float(os.getenv("PAGE_TARGET_MS", "1500"))      # max. Latenz pro Seite (Drupal-Worker nicht blockieren)
+PAGE_MAX_BYTES = int(os.getenv("PAGE_MAX_BYTES", str(4 * 1024 * 1024)))
+HTTP_RETRIES = max(0, int(os.getenv("HTTP_RETRIES", "4")))         # für 429/503
+RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "30"))
+BACKOFF_BASE = float(os.getenv("BACKOFF_BASE", "0.5"))
+BACKOFF_CAP = float(os.getenv("BACKOFF_CAP", "8"))
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") not in ("0", "false", "False")
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "/tmp/matching-http-cache")   # leer = nur im Speicher
+HTTP_CACHE_MAX_ENTRIES = max(1, int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "256")))  # Seiten
+HTTP_CACHE_PATHS = {p.strip().strip("/") for p in os.getenv("HTTP_CACHE_PATHS", "node/workshop,node/matching_config").split(",") if p.strip()}
+MATCHING_WORKERS = max(1, int(os.getenv("MATCHING_WORKERS", "2")))
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_TTL", "30"))        # Sekunden, 0 = kein Cache
+SNAPSHOT_MAX = max(1, int(os.getenv("SNAPSHOT_MAX", "8")))   # max. gecachte Snapshots (alle Events)
+WHATIF_MAX_SCENARIOS = int(os.getenv("WHATIF_MAX_SCENARIOS", "50"))
+RUN_LOG_SIZE = max(1, int(os.getenv("RUN_LOG_SIZE", "50")))   # Läufe für /matching/replay
+RUN_RESULTS_KEEP = max(1, int(os.getenv("RUN_RESULTS_KEEP", "5")))  # davon mit Zuteilung für /matching/runs/<id>
+RUN_DIR = os.getenv("RUN_DIR", "/tmp/matching-runs")   # von allen gunicorn-Workern geteilt; leer = nur im Prozess
+SSE_KEEPALIVE_S = float(os.getenv("SSE_KEEPALIVE_S", "15"))
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") in ("1", "true", "True")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/matching-profiles")
+PROFILE_KEEP = max(1, int(os.getenv("PROFILE_KEEP", "20")))
+PROFILE_TOP = max(1, int(os.getenv("PROFILE_TOP", "25")))
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "5"))          # gzip 1..9 / brotli quality 0..11
+PREMATCH_ENABLED = os.getenv("PREMATCH_ENABLED", "0") in ("1", "true", "True")
+PREMATCH_CONFIGS = [c.strip() for c in os.getenv("PREMATCH_CONFIGS", "").split(",") if c.strip()]  # leer = Standard-Config
+PREMATCH_INTERVAL_S = max(10.0, float(os.getenv("PREMATCH_INTERVAL_S", "300")))
+PREMATCH_FULL_EVERY = max(1, int(os.getenv("PREMATCH_FULL_EVERY", "12")))   # jeder n-te Zyklus: Voll-Refresh + kompletter Lauf
+PREMATCH_CPU_SHARE = min(1.0, max(0.01, float(os.getenv("PREMATCH_CPU_SHARE", "0.25"))))
+PREMATCH_MAX_REQUESTS_PER_H = int(os.getenv("PREMATCH_MAX_REQUESTS_PER_H", "1000"))
+PREMATCH_DELTA_OVERLAP_S = int(os.getenv("PREMATCH_DELTA_OVERLAP_S", "60"))  # Puffer für Uhrzeit-Abweichung zu Drupal
+PREMATCH_HISTORY = max(1, int(os.getenv("PREMATCH_HISTORY", "96")))
+PREMATCH_DIR = os.getenv("PREMATCH_DIR", "/tmp/matching-prematch")
 
 SERVICE_DEFAULTS = {
     "strategy": "fair",             # "fair" | "greedy" | "solver"
@@ -57,9 +120,10 @@ SERVICE_DEFAULTS = {
 SESSION = requests.Session()
 SESSION.trust_env = False
 SESSION.headers.update({"Accept": "application/vnd.api+json, application/json;q=0.9"})
+# 429/503 behandelt _get_json selbst (Retry-After + Jitter), hier nur Verbindungsfehler/502/504
 retry_strategy = Retry(total=4, connect=4, read=4, backoff_factor=0.5,
-                       status_forcelist=[502, 503, 504], allowed_methods=["GET"],
-                       raise_on_status=False)
+                       status_forcelist=[502, 504], allowed_methods=["GET"],
+                       respect_retry_after_header=False, raise_on_status=False)
 adapter = HTTPAdapter(max_retries=retry_strategy)
 SESSION.mount("http://", adapter)
 SESSION.mount("https://", adapter)
@@ -71,15 +135,29 @@ if BASIC_USER and BASIC_PASS:
     SESSION.auth = (BASIC_USER, BASIC_PASS)
 
 app = Flask(__name__)
-FETCH_DIAG = {"root": None, "retries": 0, "last_error": None, "effective_limit": None}
+
+class NotFoundError(LookupError):
+    """Unbekannte Config, run_id oder Profil → 404. Andere KeyError/IndexError bleiben 500er."""
+
+def _new_diag() -> Dict[str, Any]:
+    """Diagnose pro Request (kein geteilter globaler Zustand zwischen Events)."""
+    return {"root": None, "retries": 0, "last_error": None, "effective_limit": None, "sort_used": None,
+            "http": {"requests": 0, "not_modified": 0}}
 
 # --------------------------------------------------------------------------------------
 # JSON:API Fetch
 # --------------------------------------------------------------------------------------
-def _jsonapi_root() -> str:
+def emit_progress(diag: Optional[Dict[str, Any]], event: str, **data: Any) -> None:
+    """Fortschritt an einen optionalen Listener melden (diag["on_progress"], z. B. SSE-Stream)."""
+    listener = diag.get("on_progress") if diag is not None else None
+    if listener is not None:
+        listener(event, data)
+
+def _jsonapi_root(diag: Optional[Dict[str, Any]] = None) -> str:
     base = DRUPAL_URL.rstrip("/")
     root = base if base.endswith("/jsonapi") else f"{base}/jsonapi"
-    FETCH_DIAG["root"] = root
+    if diag is not None:
+        diag["root"] = root
     return root
 
 def _same_host_url(path_or_url: str) -> str:
@@ -90,18 +168,251 @@ def _same_host_url(path_or_url: str) -> str:
         return urlunparse((pr.scheme, pr.netloc, pu.path, pu.params, pu.query, pu.fragment))
     return urljoin(root.split("/jsonapi")[0] + "/", path_or_url)
 
-def _get_json(url: str, params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
-    resp = SESSION.get(url, params=params, timeout=HTTP_TIMEOUT)
+class HttpCache:
+    """
+    Validatoren (ETag/Last-Modified) + bereits geparste Payloads pro Seiten-URL.
+    Im Speicher als LRU, zusätzlich auf Platte (übersteht Neustarts), beide
+    auf HTTP_CACHE_MAX_ENTRIES begrenzt.
+    """
+
+    def __init__(self, directory: str, max_entries: int):
+        self._dir = directory
+        self._max = max_entries
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self._dir, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._mem.get(url)
+            if entry is not None:
+                self._mem.move_to_end(url)
+                return entry
+        if not self._dir:
+            return None
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        self._remember(url, entry)
+        return entry
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], payload: Dict[str, Any]) -> None:
+        entry = {"url": url, "etag": etag, "last_modified": last_modified, "payload": payload}
+        self._remember(url, entry)
+        if not self._dir:
+            return
+        try:
+            os.makedirs(self._dir, exist_ok=True)
+            tmp = self._path(url) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh, separators=(",", ":"))
+            os.replace(tmp, self._path(url))
+            self._evict_disk()
+        except OSError:
+            pass
+
+    def touch(self, url: str) -> None:
+        if self._dir:
+            try:
+                os.utime(self._path(url))
+            except OSError:
+                pass
+
+    def _remember(self, url: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._mem[url] = entry
+            self._mem.move_to_end(url)
+            while len(self._mem) > self._max:
+                self._mem.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        files = [os.path.join(self._dir, f) for f in os.listdir(self._dir) if f.endswith(".json")]
+        if len(files) <= self._max:
+            return
+        files.sort(key=lambda f: os.path.getmtime(f))
+        for f in files[:len(files) - self._max]:
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+HTTP_CACHE = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_ENTRIES)
+
+_BACKOFF_RNG = random.Random()
+
+def _retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    """Retry-After als Sekunden oder HTTP-Datum → Sekunden (None, wenn nicht vorhanden/ungültig)."""
+    value = (resp.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def _backoff_delay(attempt: int, retry_after: Optional[float]) -> float:
+    """Retry-After respektieren (+ bis zu 10 % Jitter), sonst exponentiell mit Full Jitter."""
+    if retry_after is not None:
+        base = min(retry_after, RETRY_AFTER_MAX)
+        return base + _BACKOFF_RNG.uniform(0, 0.1 * base + 0.05)
+    return _BACKOFF_RNG.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+def _get_json(url: str, params: Optional[Dict[str, str]] = None, *,
+              diag: Optional[Dict[str, Any]] = None, cacheable: bool = False,
+              meter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    GET + JSON. Für selten geänderte Collections (cacheable) mit bedingtem Request:
+    If-None-Match/If-Modified-Since aus dem HTTP-Cache, bei 304 die bereits geparste Payload.
+    429/503 werden mit Retry-After bzw. Backoff + Jitter wiederholt (HTTP_RETRIES).
+    meter (optional) bekommt ms/bytes des erfolgreichen Versuchs – für die Seitengrößen-Anpassung.
+    """
+    http = diag.setdefault("http", {"requests": 0, "not_modified": 0}) if diag is not None else {}
+    cache_url = requests.Request("GET", url, params=params).prepare().url if (cacheable and HTTP_CACHE_ENABLED) else None
+    entry = HTTP_CACHE.get(cache_url) if cache_url else None
+    headers: Dict[str, str] = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    attempt = 0
+    while True:
+        t0 = time.perf_counter()
+        resp = SESSION.get(url, params=params, timeout=HTTP_TIMEOUT, headers=headers or None)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        http["requests"] = http.get("requests", 0) + 1
+        if resp.status_code not in (429, 503) or attempt >= HTTP_RETRIES:
+            break
+        delay = _backoff_delay(attempt, _retry_after_seconds(resp))
+        http["throttled"] = http.get("throttled", 0) + 1
+        if diag is not None:
+            diag["retries"] = diag.get("retries", 0) + 1
+            diag["backoff_s"] = round(diag.get("backoff_s", 0.0) + delay, 3)
+        attempt += 1
+        time.sleep(delay)
+    if resp.status_code == 304 and entry is not None:
+        http["not_modified"] = http.get("not_modified", 0) + 1
+        HTTP_CACHE.touch(cache_url)
+        if meter is not None:
+            meter.update(ms=elapsed_ms, bytes=0, cached=True)
+        return entry["payload"]
     resp.raise_for_status()
-    return resp.json()
+    payload = resp.json()
+    if meter is not None:
+        meter.update(ms=elapsed_ms, bytes=len(resp.content), cached=False)
+    if cache_url:
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            HTTP_CACHE.put(cache_url, etag, last_modified, payload)
+    return payload
+
+# --------------------------------------------------------------------------------------
+# Adaptive Seitengröße pro Collection
+# --------------------------------------------------------------------------------------
+class PageTuner:
+    """
+    Wählt page[limit] pro Collection anhand gemessener Seiten (Latenz, Bytes).
+    Modell: Latenz ≈ a + b·n → Gesamtzeit sinkt mit größerem n; begrenzt wird n
+    durch den Server-Cap, PAGE_TARGET_MS pro Seite und PAGE_MAX_BYTES. Bei 429/503
+    wird halbiert. Passte die ganze Collection auf eine Seite, bleibt das Limit
+    (größer bringt nichts, jede neue Größe wäre nur eine neue URL). Das Limit
+    ändert sich nur zwischen zwei Fetches, nie mittendrin (Offsets/next-Links
+    bleiben konsistent).
+    """
 
-def _maybe_add_stable_sort(path: str, params: Dict[str, str], variant: int = 1) -> None:
+    def __init__(self, initial: int):
+        self._initial = max(PAGE_MIN, initial)
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _st(self, path: str) -> Dict[str, Any]:
+        st = self._state.get(path)
+        if st is None:
+            st = self._state[path] = {"limit": self._initial, "cap": None,
+                                      "samples": OrderedDict(), "bytes_per_item": None}
+        return st
+
+    def limit_for(self, path: str) -> int:
+        with self._lock:
+            return self._st(path)["limit"] if PAGE_ADAPTIVE else PAGE_CHUNK
+
+    def learn_cap(self, path: str, cap: int) -> None:
+        with self._lock:
+            st = self._st(path)
+            st["cap"] = cap if st["cap"] is None else min(st["cap"], cap)
+
+    def observe(self, path: str, items: int, ms: float, nbytes: int) -> None:
+        if items <= 0:
+            return
+        with self._lock:
+            st = self._st(path)
+            # Latenz je Seitengröße als gleitender Mittelwert; nur die letzten 8 Größen behalten
+            samples = st["samples"]
+            prev = samples.pop(items, None)
+            samples[items] = ms if prev is None else 0.7 * prev + 0.3 * ms
+            while len(samples) > 8:
+                samples.popitem(last=False)
+            bpi = nbytes / items
+            st["bytes_per_item"] = bpi if st["bytes_per_item"] is None else 0.7 * st["bytes_per_item"] + 0.3 * bpi
+
+    def finish(self, path: str, throttled: bool, complete: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            st = self._st(path)
+            used = st["limit"]
+            # höchstens Verdopplung pro Fetch – in jedem Zweig, auch mit bekanntem Server-Cap
+            upper = min(st["cap"] or float("inf"), max(used, PAGE_CHUNK) * 2)
+            if st["bytes_per_item"]:
+                upper = min(upper, max(PAGE_MIN, int(PAGE_MAX_BYTES / st["bytes_per_item"])))
+            samples = list(st["samples"].items())
+            a = b = None
+            if len(samples) >= 2:
+                # Kleinste Quadrate über (n, ms)
+                mn = sum(n for n, _ in samples) / len(samples)
+                mt = sum(t for _, t in samples) / len(samples)
+                var = sum((n - mn) ** 2 for n, _ in samples)
+                b = sum((n - mn) * (t - mt) for n, t in samples) / var if var else None
+                a = mt - (b or 0.0) * mn
+            if throttled:
+                nxt = used // 2
+            elif complete:
+                nxt = used
+            elif b is not None and b > 0:
+                nxt = int((PAGE_TARGET_MS - max(0.0, a or 0.0)) / b)
+            elif samples:
+                avg = sum(t for _, t in samples) / len(samples)
+                nxt = used * 2 if avg < PAGE_TARGET_MS / 2 else (used // 2 if avg > PAGE_TARGET_MS else used)
+            else:
+                nxt = used
+            st["limit"] = max(PAGE_MIN, int(min(upper, nxt)))
+            return {
+                "limit_used": used,
+                "next_limit": st["limit"],
+                "server_cap": st["cap"],
+                "avg_page_ms": round(sum(t for _, t in samples) / len(samples), 1) if samples else None,
+                "ms_per_item": round(b, 3) if b is not None else None,
+                "bytes_per_item": round(st["bytes_per_item"]) if st["bytes_per_item"] else None,
+                "throttled": throttled,
+                "single_page": complete,
+            }
+
+PAGE_TUNER = PageTuner(PAGE_CHUNK)
+
+def _maybe_add_stable_sort(path: str, params: Dict[str, str], diag: Dict[str, Any], variant: int = 1) -> None:
     if not path.startswith("node/") or "sort" in params:
         return
     if variant == 1:
-        params["sort"] = "drupal_internal__nid"; FETCH_DIAG["sort_used"] = "drupal_internal__nid"
+        params["sort"] = "drupal_internal__nid"; diag["sort_used"] = "drupal_internal__nid"
     elif variant == 2:
-        params["sort"] = "created";              FETCH_DIAG["sort_used"] = "created"
+        params["sort"] = "created";              diag["sort_used"] = "created"
 
 def _parse_offset_limit_from_url(url: str) -> Tuple[Optional[int], Optional[int]]:
     qs = parse_qs(urlparse(url).query)
@@ -126,45 +437,69 @@ def _effective_limit_from_payload(payload: Dict[str, Any], requested: int) -> in
             if lim and lim > 0: return lim
     return requested if requested > 0 else 50
 
-def _first_page_with_sort_fallback(url: str, base_params: Dict[str, str], path: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
-    params = dict(base_params); _maybe_add_stable_sort(path, params, 1)
+def _first_page_with_sort_fallback(url: str, base_params: Dict[str, str], path: str,
+                                   diag: Dict[str, Any], cacheable: bool = False,
+                                   meter: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    params = dict(base_params); _maybe_add_stable_sort(path, params, diag, 1)
     try:
-        return _get_json(url, params), params
+        return _get_json(url, params, diag=diag, cacheable=cacheable, meter=meter), params
     except requests.exceptions.HTTPError as e:
         if getattr(e.response, "status_code", None) != 400:
             raise
-    params2 = dict(base_params); _maybe_add_stable_sort(path, params2, 2)
+    params2 = dict(base_params); _maybe_add_stable_sort(path, params2, diag, 2)
     try:
-        return _get_json(url, params2), params2
+        return _get_json(url, params2, diag=diag, cacheable=cacheable, meter=meter), params2
     except requests.exceptions.HTTPError as e2:
         if getattr(e2.response, "status_code", None) != 400:
             raise
-    params3 = dict(base_params); FETCH_DIAG["sort_used"] = None
-    return _get_json(url, params3), params3
+    params3 = dict(base_params); diag["sort_used"] = None
+    return _get_json(url, params3, diag=diag, cacheable=cacheable, meter=meter), params3
 
-def _fetch_all(path: str, extra_params: Optional[Dict[str, str]] = None, *, published_only: Optional[bool] = None) -> List[Dict[str, Any]]:
+def _fetch_all(path: str, extra_params: Optional[Dict[str, str]] = None, *,
+               published_only: Optional[bool] = None,
+               diag: Optional[Dict[str, Any]] = None,
+               allow_empty: bool = False) -> List[Dict[str, Any]]:
     if published_only is None:
         published_only = PUBLISHED_ONLY
-    root = _jsonapi_root().rstrip("/")
+    if diag is None:
+        diag = _new_diag()
+    root = _jsonapi_root(diag).rstrip("/")
     base_url = f"{root}/{path.lstrip('/')}"
+    cacheable = path.strip("/") in HTTP_CACHE_PATHS
     base_params: Dict[str, str] = {}
     if published_only:
         base_params["filter[status][value]"] = "1"
     if extra_params:
         base_params.update(extra_params)
+    # Gecachte Collections mit festem Limit: page[limit] steckt in der Cache-URL,
+    # ein wanderndes Limit würde jeden bedingten Request zum Miss machen
+    tuned = "page[limit]" not in base_params and not cacheable
     if "page[limit]" not in base_params:
-        base_params["page[limit]"] = str(PAGE_CHUNK)
+        base_params["page[limit]"] = str(PAGE_TUNER.limit_for(path) if tuned else PAGE_CHUNK)
+    throttled_before = diag.get("http", {}).get("throttled", 0)
+    meter: Dict[str, Any] = {}
+    fetched_pages = 0
+
+    def _page_done(items: int) -> None:
+        nonlocal fetched_pages
+        fetched_pages += 1
+        if tuned and meter and not meter.get("cached"):
+            PAGE_TUNER.observe(path, items, meter["ms"], meter["bytes"])
+        emit_progress(diag, "fetch", collection=path, pages=fetched_pages,
+                      items=len(result_by_id), cached=bool(meter.get("cached")))
+        meter.clear()
 
     params0 = dict(base_params); params0["page[offset]"] = "0"
-    payload, used_params = _first_page_with_sort_fallback(base_url, params0, path)
+    payload, used_params = _first_page_with_sort_fallback(base_url, params0, path, diag, cacheable, meter)
     data = payload.get("data", []) or []
     if isinstance(data, dict): data = [data]
 
     result_by_id: Dict[str, Dict[str, Any]] = {item["id"]: item for item in data}
+    _page_done(len(data))
 
     requested = int(base_params.get("page[limit]", PAGE_CHUNK))
     eff_limit = _effective_limit_from_payload(payload, requested)
-    FETCH_DIAG["effective_limit"] = eff_limit
+    diag["effective_limit"] = eff_limit
 
     visited_offsets: set[int] = set()
     visited_urls: set[str] = set()
@@ -178,6 +513,7 @@ def _fetch_all(path: str, extra_params: Optional[Dict[str, str]] = None, *, publ
 
     pages = 1
     next_url = _extract_next_href(payload)
+    single_page = next_url is None and len(data) < requested
     while next_url and pages < MAX_PAGES:
         if next_url in visited_urls:
             break
@@ -185,12 +521,15 @@ def _fetch_all(path: str, extra_params: Optional[Dict[str, str]] = None, *, publ
         off, lim = _parse_offset_limit_from_url(next_url)
         if lim and lim > 0:
             eff_limit = lim
-            FETCH_DIAG["effective_limit"] = eff_limit
+            diag["effective_limit"] = eff_limit
+            if tuned and lim < requested:
+                PAGE_TUNER.learn_cap(path, lim)
         if off is not None:
             visited_offsets.add(off)
         try:
-            payload = _get_json(next_url)
-        except Exception:
+            payload = _get_json(next_url, diag=diag, cacheable=cacheable, meter=meter)
+        except Exception as e:
+            diag["last_error"] = f"{path}: {e}"
             break
         data = payload.get("data", []) or []
         if isinstance(data, dict): data = [data]
@@ -198,6 +537,7 @@ def _fetch_all(path: str, extra_params: Optional[Dict[str, str]] = None, *, publ
             break
         for item in data:
             result_by_id[item["id"]] = item
+        _page_done(len(data))
         pages += 1
         next_url = _extract_next_href(payload)
 
@@ -209,8 +549,9 @@ def _fetch_all(path: str, extra_params: Optional[Dict[str, str]] = None, *, publ
         page_params["page[limit]"] = str(eff_limit)
         page_params["page[offset]"] = str(offset)
         try:
-            payload = _get_json(base_url, params=page_params)
-        except Exception:
+            payload = _get_json(base_url, params=page_params, diag=diag, cacheable=cacheable, meter=meter)
+        except Exception as e:
+            diag["last_error"] = f"{path}: {e}"
             break
         data = payload.get("data", []) or []
         if isinstance(data, dict): data = [data]
@@ -218,8 +559,13 @@ def _fetch_all(path: str, extra_params: Optional[Dict[str, str]] = None, *, publ
             break
         for item in data:
             result_by_id[item["id"]] = item
+        _page_done(len(data))
 
-    if not result_by_id:
+    if tuned:
+        throttled = diag.get("http", {}).get("throttled", 0) > throttled_before
+        diag.setdefault("page_tuning", {})[path] = PAGE_TUNER.finish(path, throttled, single_page)
+
+    if not result_by_id and not allow_empty:
         raise RuntimeError(f"JSON:API fetch failed for '{path}' – keine Daten erhalten.")
     return list(result_by_id.values())
 
@@ -243,12 +589,31 @@ class Participant:
 # --------------------------------------------------------------------------------------
 # Config & Daten laden
 # --------------------------------------------------------------------------------------
-def load_matching_config() -> Dict[str, Any]:
+def _config_filter(config_id: str) -> Dict[str, str]:
+    """UUID oder Node-ID (nid) einer matching_config → JSON:API-Filter."""
+    cid = str(config_id).strip()
+    if cid.isdigit():
+        return {"filter[drupal_internal__nid]": cid}
+    return {"filter[id]": cid}
+
+def load_matching_config(config_id: Optional[str] = None, *, diag: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Nur schlanke Node-Felder lesen; alles andere aus SERVICE_DEFAULTS
     oder ad-hoc per Request-Body.
+
+    Ohne config_id wird (wie bisher) die erste matching_config genommen,
+    mit config_id (UUID oder nid) genau diese – so kann ein Service mehrere
+    Camps/Config-Varianten parallel bedienen.
     """
-    nodes = _fetch_all("node/matching_config", extra_params={"page[limit]": "1"})
+    extra = {"page[limit]": "1"}
+    if config_id:
+        extra.update(_config_filter(config_id))
+        try:
+            nodes = _fetch_all("node/matching_config", extra_params=extra, published_only=False, diag=diag)
+        except RuntimeError:
+            raise NotFoundError(f"matching_config '{config_id}' nicht gefunden.")
+    else:
+        nodes = _fetch_all("node/matching_config", extra_params=extra, diag=diag)
     cfg = {
         "num_wishes": 5,
         "num_assign": 3,
@@ -257,6 +622,8 @@ def load_matching_config() -> Dict[str, Any]:
         # Strategy/Tuning erst mal aus Service-Defaults (können per Body überschrieben werden)
         **SERVICE_DEFAULTS,
         "seed": DEFAULT_SEED,
+        "config_id": None,
+        "config_title": None,
     }
     if nodes:
         n = nodes[0]
@@ -268,10 +635,25 @@ def load_matching_config() -> Dict[str, Any]:
         cfg["num_assign"] = int(av("field_zuteilung", av("field_num_zuteilung", cfg["num_assign"])) or cfg["num_assign"])
         cfg["slot_start"] = av("field_slot_start", None)
         cfg["slot_end"] = av("field_slot_end", None)
+        cfg["config_id"] = n.get("id")
+        cfg["config_title"] = av("title", None)
     return cfg
 
-def load_workshops() -> Dict[str, Workshop]:
-    nodes = _fetch_all("node/workshop")
+def list_matching_configs(*, diag: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    nodes = _fetch_all("node/matching_config", published_only=False, diag=diag)
+    out = []
+    for n in nodes:
+        attrs = n.get("attributes", {}) or {}
+        out.append({
+            "id": n.get("id"),
+            "nid": attrs.get("drupal_internal__nid"),
+            "title": attrs.get("title"),
+            "status": attrs.get("status"),
+        })
+    return out
+
+def load_workshops(*, diag: Optional[Dict[str, Any]] = None) -> Dict[str, Workshop]:
+    nodes = _fetch_all("node/workshop", diag=diag)
     out: Dict[str, Workshop] = {}
     for d in nodes:
         attrs = d.get("attributes", {})
@@ -282,10 +664,7 @@ def load_workshops() -> Dict[str, Workshop]:
         )
     return out
 
-def load_participants_and_wishes(num_wishes: int) -> Dict[str, Participant]:
-    tns = _fetch_all("node/teilnehmer")
-    wns = _fetch_all("node/wunsch")
-
+def _wishes_by_participant(wns: List[Dict[str, Any]], num_wishes: int) -> Dict[str, List[str]]:
     wishes_by_participant: Dict[str, List[str]] = defaultdict(list)
     for w in wns:
         rel = w.get("relationships", {}) or {}
@@ -298,18 +677,219 @@ def load_participants_and_wishes(num_wishes: int) -> Dict[str, Participant]:
         if num_wishes > 0:
             wish_ids = wish_ids[:num_wishes]
         wishes_by_participant[pid] = wish_ids
-
-    out: Dict[str, Participant] = {}
+    return wishes_by_participant
+
+def _participant_from_node(n: Dict[str, Any], wishes: List[str]) -> Participant:
+    attrs = n.get("attributes", {}) or {}
+    return Participant(
+        id=n["id"],
+        code=attrs.get("field_code") or "",
+        region=attrs.get("field_regionalverband") or None,
+        wishes=wishes,
+    )
+
+def load_participants_and_wishes(num_wishes: int, *, diag: Optional[Dict[str, Any]] = None) -> Dict[str, Participant]:
+    tns = _fetch_all("node/teilnehmer", diag=diag)
+    wns = _fetch_all("node/wunsch", diag=diag)
+    wishes_by_participant = _wishes_by_participant(wns, num_wishes)
+    return {n["id"]: _participant_from_node(n, wishes_by_participant.get(n["id"], [])) for n in tns}
+
+def _changed_since(ts: int) -> Dict[str, str]:
+    """JSON:API-Filter: nur Knoten mit changed > ts (Unix-Zeit)."""
+    return {"filter[delta][condition][path]": "changed",
+            "filter[delta][condition][operator]": ">",
+            "filter[delta][condition][value]": str(int(ts))}
+
+def load_participant_delta(base: Dict[str, Participant], num_wishes: int, since: int, *,
+                           diag: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Participant], List[str]]:
+    """
+    Seit `since` geänderte Teilnehmende/Wunschlisten holen und auf `base` anwenden.
+    Gelöschte oder unveröffentlichte Knoten erkennt ein Delta nicht – dafür gibt es
+    den periodischen Voll-Refresh. Rückgabe: (neue Teilnehmenden-Map, geänderte IDs)
+    """
+    tns = _fetch_all("node/teilnehmer", extra_params=_changed_since(since), diag=diag, allow_empty=True)
+    wns = _fetch_all("node/wunsch", extra_params=_changed_since(since), diag=diag, allow_empty=True)
+    wishes = _wishes_by_participant(wns, num_wishes)
+    out = dict(base)
     for n in tns:
-        attrs = n.get("attributes", {}) or {}
-        pid = n["id"]
-        out[pid] = Participant(
-            id=pid,
-            code=attrs.get("field_code") or "",
-            region=attrs.get("field_regionalverband") or None,
-            wishes=wishes_by_participant.get(pid, []),
-        )
-    return out
+        old = base.get(n["id"])
+        out[n["id"]] = _participant_from_node(n, old.wishes if old else [])
+    for pid, wish_ids in wishes.items():
+        if pid in out:
+            out[pid] = replace(out[pid], wishes=wish_ids)
+    changed = [pid for pid, p in out.items() if pid not in base or base[pid].wishes != p.wishes]
+    return out, changed
+
+# --------------------------------------------------------------------------------------
+# Snapshots pro Event (Config + Workshops + Teilnehmende/Wünsche)
+# --------------------------------------------------------------------------------------
+@dataclass
+class Snapshot:
+    event: str
+    cfg: Dict[str, Any]
+    workshops: Dict[str, Workshop]
+    participants: Dict[str, Participant]
+    loaded_at: float = field(default_factory=time.time)
+    _digest: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.loaded_at
+
+    @property
+    def digest(self) -> str:
+        """Fingerprint der Eingabedaten (Kapazitäten + Wunschlisten in Ladereihenfolge)."""
+        if self._digest is None:
+            h = hashlib.sha256()
+            for w in self.workshops.values():
+                h.update(f"w|{w.id}|{w.capacity}\n".encode())
+            for p in self.participants.values():
+                h.update(f"p|{p.id}|{','.join(p.wishes)}\n".encode())
+            self._digest = h.hexdigest()[:16]
+        return self._digest
+
+_SNAPSHOTS: Dict[Tuple[str, Optional[int]], Snapshot] = {}
+_SNAPSHOT_LOCK = threading.Lock()
+# Lade-Lock pro Schlüssel mit Zähler der wartenden/ladenden Requests; Einträge leben nur,
+# solange jemand lädt oder ein Snapshot im Cache liegt (keine Leiche pro unbekannter config_id)
+_SNAPSHOT_LOAD_LOCKS: Dict[Tuple[str, Optional[int]], List[Any]] = {}
+
+def _drop_load_lock(key: Tuple[str, Optional[int]]) -> None:
+    # nur unter _SNAPSHOT_LOCK aufrufen
+    entry = _SNAPSHOT_LOAD_LOCKS.get(key)
+    if entry is not None and entry[1] == 0 and key not in _SNAPSHOTS:
+        del _SNAPSHOT_LOAD_LOCKS[key]
+
+def load_snapshot(config_id: Optional[str] = None, *,
+                  num_wishes: Optional[int] = None,
+                  refresh: bool = False,
+                  diag: Optional[Dict[str, Any]] = None) -> Snapshot:
+    """
+    Snapshot für ein Event laden bzw. aus dem Cache (SNAPSHOT_TTL) nehmen.
+    Schlüssel: (config_id, num_wishes-Override) – verschiedene Events teilen
+    sich keinen Cache-Eintrag und keine Diagnose.
+    """
+    if diag is None:
+        diag = _new_diag()
+    key = (str(config_id or ""), int(num_wishes) if num_wishes else None)
+    with _SNAPSHOT_LOCK:
+        entry = _SNAPSHOT_LOAD_LOCKS.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        # Pro Schlüssel nur ein Loader gleichzeitig – parallele Requests desselben Events warten
+        with entry[0]:
+            return _load_snapshot_locked(key, config_id, num_wishes, refresh, diag)
+    finally:
+        with _SNAPSHOT_LOCK:
+            entry[1] -= 1
+            _drop_load_lock(key)
+
+def _load_snapshot_locked(key: Tuple[str, Optional[int]], config_id: Optional[str],
+                          num_wishes: Optional[int], refresh: bool, diag: Dict[str, Any]) -> Snapshot:
+    with _SNAPSHOT_LOCK:
+        snap = _SNAPSHOTS.get(key)
+    if snap is not None and not refresh and SNAPSHOT_TTL > 0 and snap.age_s < SNAPSHOT_TTL:
+        diag["snapshot"] = {"cached": True, "age_s": round(snap.age_s, 2)}
+        emit_progress(diag, "snapshot", **diag["snapshot"], participants=len(snap.participants),
+                      workshops=len(snap.workshops))
+        return snap
+
+    cfg = load_matching_config(config_id, diag=diag)
+    if num_wishes:
+        cfg["num_wishes"] = int(num_wishes)
+    workshops = load_workshops(diag=diag)
+    participants = load_participants_and_wishes(cfg["num_wishes"], diag=diag)
+    snap = Snapshot(event=cfg.get("config_id") or "default", cfg=cfg,
+                    workshops=workshops, participants=participants)
+    diag["snapshot"] = {"cached": False, "age_s": 0.0}
+    emit_progress(diag, "snapshot", **diag["snapshot"], participants=len(participants),
+                  workshops=len(workshops))
+    if SNAPSHOT_TTL > 0:
+        with _SNAPSHOT_LOCK:
+            _SNAPSHOTS[key] = snap
+            while len(_SNAPSHOTS) > SNAPSHOT_MAX:
+                oldest = min(_SNAPSHOTS, key=lambda k: _SNAPSHOTS[k].loaded_at)
+                _SNAPSHOTS.pop(oldest, None)
+                _drop_load_lock(oldest)
+    return snap
+
+# --------------------------------------------------------------------------------------
+# Fair-Scheduler: Matching-Jobs reihum pro Event auf einem Worker-Pool
+# --------------------------------------------------------------------------------------
+class EventScheduler:
+    """
+    Kleiner Thread-Pool mit einer Warteschlange pro Event. Freie Worker
+    bedienen die Events reihum (Round-Robin), damit ein Event mit vielen
+    teuren Läufen (z. B. Proberuns) ein anderes nicht aushungert.
+    """
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._queues: Dict[str, deque] = {}
+        self._order: deque = deque()
+        self._running: Counter = Counter()
+        self._cv = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_started(self) -> None:
+        # Lazy starten (erst nach dem gunicorn-Fork)
+        if self._threads:
+            return
+        for i in range(self._workers):
+            t = threading.Thread(target=self._loop, name=f"matching-worker-{i+1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, event: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        fut: Future = Future()
+        with self._cv:
+            self._ensure_started()
+            q = self._queues.get(event)
+            if q is None:
+                q = self._queues[event] = deque()
+                self._order.append(event)
+            q.append((fut, time.monotonic(), fn, args, kwargs))
+            self._cv.notify()
+        return fut
+
+    def run(self, event: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return self.submit(event, fn, *args, **kwargs).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            return {
+                "workers": self._workers,
+                "queued": {ev: len(q) for ev, q in self._queues.items()},
+                "running": {ev: n for ev, n in self._running.items() if n},
+            }
+
+    def _loop(self) -> None:
+        while True:
+            with self._cv:
+                while not self._order:
+                    self._cv.wait()
+                event = self._order.popleft()
+                q = self._queues[event]
+                fut, enqueued, fn, args, kwargs = q.popleft()
+                if q:
+                    self._order.append(event)
+                else:
+                    del self._queues[event]
+                self._running[event] += 1
+            try:
+                if fut.set_running_or_notify_cancel():
+                    diag = kwargs.get("diag")
+                    if isinstance(diag, dict):
+                        diag["queued_ms"] = round((time.monotonic() - enqueued) * 1000, 1)
+                    try:
+                        fut.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        fut.set_exception(e)
+            finally:
+                with self._cv:
+                    self._running[event] -= 1
+
+SCHEDULER = EventScheduler(MATCHING_WORKERS)
 
 # --------------------------------------------------------------------------------------
 # Metriken
@@ -433,59 +1013,17 @@ def compute_quality_metrics(assignments: Dict[str, Dict[int, str]],
         "topk_coverage_hist": dict(topk_hits_hist),
     }
 
-# --------------------------------------------------------------------------------------
-# Strategy 1: Greedy
-# --------------------------------------------------------------------------------------
-def run_matching(participants: Dict[str, 'Participant'],
-                 workshops: Dict[str, 'Workshop'],
-                 cfg: Dict[str, Any]) -> Tuple[Dict[str, Dict[int, str]], Dict[str, Any]]:
-    num_assign = cfg["num_assign"]
-    num_wishes = cfg["num_wishes"]
-    topk = num_assign if cfg.get("topk_equals_slots", True) else min(num_assign, num_wishes)
-    seed = (cfg.get("seed") or "").strip()
-    rng = random.Random(seed or None)
-
-    cap_per_slot: Dict[int, Dict[str, int]] = {s: {w.id: w.capacity for w in workshops.values()} for s in range(1, num_assign + 1)}
-    pids = list(participants.keys()); rng.shuffle(pids)
-    assignments: Dict[str, Dict[int, str]] = {pid: {} for pid in pids}
-
-    # (optional) Slicing aus Defaults nicht mehr aus Node — hier deaktiviert
-    used_per_slot: Dict[int, Counter] = {s: Counter() for s in range(1, num_assign + 1)}
-
-    for s in range(1, num_assign + 1):
-        rotated = pids[s - 1:] + pids[:s - 1]
-        for pid in rotated:
-            p = participants[pid]
-            assigned = False
-            for wid in p.wishes[:num_wishes]:
-                if wid in assignments[pid].values():
-                    continue
-                if cap_per_slot[s].get(wid, 0) <= 0:
-                    continue
-                assignments[pid][s] = wid
-                cap_per_slot[s][wid] -= 1
-                used_per_slot[s][wid] += 1
-                assigned = True
-                break
-            if assigned:
-                continue
-            for wid, rest in list(cap_per_slot[s].items()):
-                if rest <= 0:
-                    continue
-                if wid in assignments[pid].values():
-                    continue
-                assignments[pid][s] = wid
-                cap_per_slot[s][wid] -= 1
-                used_per_slot[s][wid] += 1
-                break
-
-    # Weights vorbereiten
-    weights = cfg.get("weights") or SERVICE_DEFAULTS["weights"]
-    weights = _extend_weights({int(k): float(v) for k, v in weights.items()}, topk)
-
+def _summarize_assignments(assignments: Dict[str, Dict[int, str]],
+                           participants: Dict[str, 'Participant'],
+                           workshops: Dict[str, 'Workshop'],
+                           cap_per_slot: Dict[int, Dict[str, int]],
+                           weights: Dict[int, float],
+                           topk: int,
+                           num_assign: int,
+                           num_wishes: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Gemeinsame Summary aller Strategien (und der What-if-Szenarien)."""
+    pids = list(assignments.keys())
     quality = compute_quality_metrics(assignments, participants, weights, topk, num_assign)
-    happy = quality["happy_mean"]
-
     per_slot_counts = {s: len([1 for pid in pids if assignments[pid].get(s)]) for s in range(1, num_assign + 1)}
     assign_dist = Counter([len(assignments[pid]) for pid in pids])
     cap_total = sum(w.capacity for w in workshops.values()) * num_assign
@@ -499,7 +1037,7 @@ def run_matching(participants: Dict[str, 'Participant'],
 
     unfilled = []
     for wid, w in workshops.items():
-        remaining_total = sum(cap_per_slot[s][wid] for s in cap_per_slot)
+        remaining_total = sum(cap_per_slot[s].get(wid, 0) for s in cap_per_slot)
         if remaining_total > 0:
             unfilled.append({"id": wid, "title": w.title, "remaining": remaining_total})
 
@@ -512,7 +1050,6 @@ def run_matching(participants: Dict[str, 'Participant'],
                 per_priority_fulfilled[prio] = per_priority_fulfilled.get(prio, 0) + 1
 
     summary = {
-        "seed": seed or "random",
         "participants_total": len(pids),
         "participants_no_wishes": len([1 for p in participants.values() if not p.wishes]),
         "assignments_total": sum(len(v) for v in assignments.values()),
@@ -526,7 +1063,7 @@ def run_matching(participants: Dict[str, 'Participant'],
         "unfilled_workshops_count": len(unfilled),
         "warning_capacity_deficit": max(0, (len(pids) * num_assign) - cap_total),
         "all_filled_to_slots": all(len(assignments[pid]) == num_assign for pid in pids),
-        "happy_index": round(happy, 4),
+        "happy_index": quality["happy_mean"],
         "min_user_happy": quality["min_user_happy"],
         "median_user_happy": quality["median_user_happy"],
         "gini_dissatisfaction": quality["gini_dissatisfaction"],
@@ -535,15 +1072,124 @@ def run_matching(participants: Dict[str, 'Participant'],
         "no_topk_rate": quality["no_topk_rate"],
         "topk_coverage_hist": quality["topk_coverage_hist"],
     }
+    return summary, unfilled
+
+# --------------------------------------------------------------------------------------
+# Zufall / Seeds: ein Seed pro Lauf, daraus abgeleitete Streams
+# --------------------------------------------------------------------------------------
+def _resolve_seed(cfg: Dict[str, Any]) -> str:
+    """Leerer Seed → frischer Zufalls-Seed, der anschließend immer berichtet wird."""
+    seed = str(cfg.get("seed") or "").strip()
+    return seed or secrets.token_hex(6)
+
+def _rng(seed: str, *labels: Any) -> random.Random:
+    """
+    Unabhängiger, reproduzierbarer Stream je (Seed, Zweck, Slot …).
+    String-Seeds werden von random.Random per SHA-512 gehasht → stabil über Prozesse.
+    """
+    return random.Random("|".join([seed, *(str(x) for x in labels)]))
+
+# --------------------------------------------------------------------------------------
+# Strategy 1: Greedy
+# --------------------------------------------------------------------------------------
+def run_matching(participants: Dict[str, 'Participant'],
+                 workshops: Dict[str, 'Workshop'],
+                 cfg: Dict[str, Any]) -> Tuple[Dict[str, Dict[int, str]], Dict[str, Any]]:
+    num_assign = cfg["num_assign"]
+    num_wishes = cfg["num_wishes"]
+    topk = num_assign if cfg.get("topk_equals_slots", True) else min(num_assign, num_wishes)
+    seed = _resolve_seed(cfg)
+
+    cap_per_slot: Dict[int, Dict[str, int]] = {s: {w.id: w.capacity for w in workshops.values()} for s in range(1, num_assign + 1)}
+    pids = list(participants.keys()); _rng(seed, "order").shuffle(pids)
+    assignments: Dict[str, Dict[int, str]] = {pid: {} for pid in pids}
+
+    # (optional) Slicing aus Defaults nicht mehr aus Node — hier deaktiviert
+    used_per_slot: Dict[int, Counter] = {s: Counter() for s in range(1, num_assign + 1)}
+
+    for s in range(1, num_assign + 1):
+        rotated = pids[s - 1:] + pids[:s - 1]
+        for pid in rotated:
+            p = participants[pid]
+            assigned = False
+            for wid in p.wishes[:num_wishes]:
+                if wid in assignments[pid].values():
+                    continue
+                if cap_per_slot[s].get(wid, 0) <= 0:
+                    continue
+                assignments[pid][s] = wid
+                cap_per_slot[s][wid] -= 1
+                used_per_slot[s][wid] += 1
+                assigned = True
+                break
+            if assigned:
+                continue
+            for wid, rest in list(cap_per_slot[s].items()):
+                if rest <= 0:
+                    continue
+                if wid in assignments[pid].values():
+                    continue
+                assignments[pid][s] = wid
+                cap_per_slot[s][wid] -= 1
+                used_per_slot[s][wid] += 1
+                break
+
+    # Weights vorbereiten
+    weights = cfg.get("weights") or SERVICE_DEFAULTS["weights"]
+    weights = _extend_weights({int(k): float(v) for k, v in weights.items()}, topk)
+
+    summary, unfilled = _summarize_assignments(assignments, participants, workshops, cap_per_slot,
+                                               weights, topk, num_assign, num_wishes)
+    summary["seed"] = seed
     meta = {"unfilled_workshops": unfilled}
     return assignments, {"summary": summary, **meta}
 
 # --------------------------------------------------------------------------------------
 # Strategy 2: Fair (Mehr-Runden + Deckel)
 # --------------------------------------------------------------------------------------
+MatchResult = Tuple[Dict[str, Dict[int, str]], Dict[str, Any]]
+# Strategie-Generatoren: liefern Fortschritts-Events (dicts), Rückgabewert ist das Ergebnis
+MatchProgress = Generator[Dict[str, Any], None, MatchResult]
+
+def drain(gen: MatchProgress, on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> MatchResult:
+    """Strategie-Generator bis zum Ende laufen lassen; Events optional weiterreichen."""
+    while True:
+        try:
+            ev = next(gen)
+        except StopIteration as stop:
+            return stop.value
+        if on_event is not None:
+            on_event(ev)
+
+def _fair_key(objective: str, s: Dict[str, Any]) -> Tuple[float, float, float]:
+    if objective == "fair_maxmin":
+        return (-round(s.get("min_user_happy", 0.0), 4),
+                -round(s.get("median_user_happy", 0.0), 4),
+                round(s.get("gini_dissatisfaction", 1.0), 4))
+    if objective == "leximin":
+        return (-round(s.get("min_user_happy", 0.0), 4),
+                round(s.get("gini_dissatisfaction", 1.0), 4),
+                -round(s.get("happy_index", 0.0), 4))
+    # happy_mean
+    return (-round(s.get("happy_index", 0.0), 4),
+            -round(s.get("median_user_happy", 0.0), 4),
+            round(s.get("gini_dissatisfaction", 1.0), 4))
+
 def run_matching_fair(participants: Dict[str, 'Participant'],
                       workshops: Dict[str, 'Workshop'],
-                      cfg: Dict[str, Any]) -> Tuple[Dict[str, Dict[int, str]], Dict[str, Any]]:
+                      cfg: Dict[str, Any],
+                      bounds: Optional[Dict[str, Any]] = None) -> MatchResult:
+    return drain(iter_matching_fair(participants, workshops, cfg, bounds))
+
+def iter_matching_fair(participants: Dict[str, 'Participant'],
+                       workshops: Dict[str, 'Workshop'],
+                       cfg: Dict[str, Any],
+                       bounds: Optional[Dict[str, Any]] = None) -> MatchProgress:
+    """
+    Fair-Strategie als Generator: ein Event pro abgeschlossenem Seed (Key, bisher bester Seed).
+    Mit stop_at_bound (und bounds aus compute_bounds) endet die Seed-Schleife, sobald die
+    primäre Kennzahl des Objectives die obere Schranke erreicht.
+    """
     num_assign = cfg["num_assign"]
     num_wishes = cfg["num_wishes"]
     topk = num_assign if cfg.get("topk_equals_slots", True) else min(num_assign, num_wishes)
@@ -569,9 +1215,81 @@ def run_matching_fair(participants: Dict[str, 'Participant'],
     renner_ids = {wid for wid, _ in pop_counter.most_common(renner_cut)}
     pids_all = list(participants.keys())
 
-    def single_run(seed_val: Optional[str]) -> Tuple[Dict[str, Dict[int, str]], Dict[str, Any]]:
-        rng = random.Random((seed_val or "").strip() or None)
-        pids = pids_all[:]; rng.shuffle(pids)
+    base_seed = _resolve_seed(cfg)
+    prune = cfg.get("prune_seeds", True) not in (False, 0, "0", "false", "False")
+    w_full = _extend_weights({int(k): float(v) for k, v in weights.items()}, topk)
+    w_last = w_full[max(w_full.keys())] if w_full else 0.0
+    weight_sum = sum(w_full.get(r, w_last) for r in range(1, topk + 1)) or 1.0
+    # Top-k-Wünsche mit Gewicht (erste Nennung zählt, wie in compute_happy_index)
+    ranked_wishes: Dict[str, List[Tuple[str, float]]] = {}
+    for pid, p in participants.items():
+        wl = p.wishes[:topk]
+        ranked_wishes[pid] = [(wid, w_full.get(i + 1, w_last)) for i, wid in enumerate(wl) if wl.index(wid) == i]
+
+    wished_ids = {wid for ranked in ranked_wishes.values() for wid, _ in ranked}
+    all_wishes = {pid: p.wishes for pid, p in participants.items()}
+
+    def optimistic_key(assignments: Dict[str, Dict[int, str]],
+                       cap_per_slot: Dict[int, Dict[str, int]]) -> Tuple[float, float, float]:
+        """
+        Bestmöglicher Objective-Key, den dieser Seed noch erreichen kann. Spätere Runden
+        ergänzen nur Zuteilungen: pro Person aktueller Score + die besten noch offenen
+        Top-k-Wünsche (Restkapazität in einem freien Slot), höchstens so viele wie freie Slots.
+        Zusätzlich verbraucht jeder Zugewinn einen der R freien Plätze in gewünschten Workshops.
+        Jede Komponente ist eine Schranke in Richtung "besser" (Gini ≥ 0).
+        """
+        cur: List[float] = []
+        ub: List[float] = []
+        gains: List[float] = []
+        for pid, slots in assignments.items():
+            score = 0.0
+            potential: List[float] = []
+            free = [s for s in range(1, num_assign + 1) if s not in slots]
+            held = slots.values()
+            for wid, wt in ranked_wishes[pid]:
+                if wid in held:
+                    score += wt
+                elif free and any(cap_per_slot[s].get(wid, 0) > 0 for s in free):
+                    potential.append(wt)
+            best_gain = heapq.nlargest(len(free), potential) if potential else []
+            gains.extend(best_gain)
+            cur.append(score / weight_sum if topk else 0.0)
+            ub.append((score + sum(best_gain)) / weight_sum if topk else 0.0)
+        n = len(ub)
+        if not n:
+            return (0.0, 0.0, 0.0)
+        seats_left = sum(rest for caps in cap_per_slot.values() for wid, rest in caps.items()
+                         if rest > 0 and wid in wished_ids)
+        ub.sort(reverse=True); cur.sort(reverse=True)
+
+        def kth_ub(need: int) -> float:
+            # Größtes m mit: mind. `need` Personen ≥ m – jede darunter braucht einen der freien Plätze
+            m = ub[need - 1]
+            if need > seats_left:
+                m = min(m, cur[need - seats_left - 1])
+            return m
+
+        mean_ub = min(sum(ub), sum(cur) + sum(heapq.nlargest(seats_left, gains)) / weight_sum) / n
+        min_ub = kth_ub(n)
+        median_ub = kth_ub(n - n // 2)
+        if objective == "fair_maxmin":
+            return (-round(min_ub, 4), -round(median_ub, 4), 0.0)
+        if objective == "leximin":
+            return (-round(min_ub, 4), 0.0, -round(mean_ub, 4))
+        return (-round(mean_ub, 4), -round(median_ub, 4), 0.0)
+
+    def hopeless(assignments: Dict[str, Dict[int, str]], cap_per_slot: Dict[int, Dict[str, int]],
+                 incumbent: Optional[Tuple[float, float, float]]) -> bool:
+        # Key ≥ optimistischer Key komponentenweise → bei opt ≥ incumbent kann der Seed nicht mehr gewinnen
+        return prune and incumbent is not None and optimistic_key(assignments, cap_per_slot) >= incumbent
+
+    def single_run(seed_val: str, incumbent: Optional[Tuple[float, float, float]] = None
+                   ) -> Tuple[Optional[Tuple[Dict[str, Dict[int, str]], Dict[str, Any]]], int]:
+        """
+        Ein Seed; liefert (Ergebnis, 0) oder (None, 2), wenn er nach Runde 2 verworfen wurde.
+        Nach Runde 1 wird nicht geprüft: Runde 2 holt dort zu viel auf, die Schranke greift praktisch nie.
+        """
+        pids = pids_all[:]; _rng(seed_val, "order").shuffle(pids)
         cap_per_slot: Dict[int, Dict[str, int]] = {s: {w.id: w.capacity for w in workshops.values()} for s in range(1, num_assign + 1)}
         used_per_slot: Dict[int, Counter] = {s: Counter() for s in range(1, num_assign + 1)}
         assignments: Dict[str, Dict[int, str]] = {pid: {} for pid in pids}
@@ -598,15 +1316,18 @@ def run_matching_fair(participants: Dict[str, 'Participant'],
                     break
 
         # Runde 2: Benachteiligte zuerst
+        # Happy-Werte einmal pro Slot statt pro Sortierschlüssel (sorted wertet alle Keys vor der Zuteilung aus)
+        per_user_happy: Dict[str, float] = {}
+
         def underserved_key(pid: str) -> Tuple[int, float, float]:
             got = len(assignments[pid])
             wishes_k = participants[pid].wishes[:topk]
             hits = sum(1 for wid in assignments[pid].values() if wid in wishes_k)
-            _, per_user_happy = compute_happy_index(assignments, {k: v.wishes for k, v in participants.items()}, _extend_weights({int(k):float(v) for k,v in weights.items()}, topk), topk)
             unhappy = 1.0 - per_user_happy.get(pid, 0.0)
             return (got, -float(hits), unhappy + alpha * (num_assign - got))
 
         for s in range(1, num_assign + 1):
+            _, per_user_happy = compute_happy_index(assignments, all_wishes, w_full, topk)
             order = sorted(pids, key=underserved_key)
             for pid in order:
                 if s in assignments[pid]:
@@ -631,10 +1352,13 @@ def run_matching_fair(participants: Dict[str, 'Participant'],
                     assignments[pid][s] = wid
                     cap_per_slot[s][wid] -= 1
                     break
+        if hopeless(assignments, cap_per_slot, incumbent):
+            return None, 2
 
         # Runde 3: Auffüllen
         for s in range(1, num_assign + 1):
-            order = sorted(pids, key=lambda pid: (len(assignments[pid]), random.random()))
+            fill_rng = _rng(seed_val, "fill", s)
+            order = sorted(pids, key=lambda pid: (len(assignments[pid]), fill_rng.random()))
             for pid in order:
                 if s in assignments[pid]:
                     continue
@@ -648,90 +1372,49 @@ def run_matching_fair(participants: Dict[str, 'Participant'],
                     break
 
         # Metriken
-        w_full = _extend_weights({int(k): float(v) for k, v in weights.items()}, topk)
-        quality = compute_quality_metrics(assignments, participants, w_full, topk, num_assign)
-        per_slot_counts = {s: len([1 for pid in pids_all if assignments[pid].get(s)]) for s in range(1, num_assign + 1)}
-        assign_dist = Counter([len(assignments[pid]) for pid in pids_all])
-        cap_total = sum(w.capacity for w in workshops.values()) * num_assign
-        cap_remaining = sum(sum(max(0, x) for x in cap_per_slot[s].values()) for s in cap_per_slot)
-
-        filler_count = 0
-        for pid in pids_all:
-            for s_idx, wid in assignments[pid].items():
-                if wid not in participants[pid].wishes[:num_wishes]:
-                    filler_count += 1
-
-        unfilled = []
-        for wid, w in workshops.items():
-            remaining_total = sum(cap_per_slot[s][wid] for s in cap_per_slot)
-            if remaining_total > 0:
-                unfilled.append({"id": wid, "title": w.title, "remaining": remaining_total})
-
-        per_priority_fulfilled = dict({i: 0 for i in range(1, num_wishes + 1)})
-        for pid in pids_all:
-            wish_list = participants[pid].wishes[:num_wishes]
-            for s_idx, wid in assignments[pid].items():
-                if wid in wish_list:
-                    prio = wish_list.index(wid) + 1
-                    per_priority_fulfilled[prio] = per_priority_fulfilled.get(prio, 0) + 1
-
-        summary = {
-            "seed": seed_val or "random",
-            "participants_total": len(pids_all),
-            "participants_no_wishes": len([1 for p in participants.values() if not p.wishes]),
-            "assignments_total": sum(len(v) for v in assignments.values()),
-            "target_assignments_total": len(pids_all) * num_assign,
-            "assignment_distribution": dict(assign_dist),
-            "per_slot_assigned_counts": per_slot_counts,
-            "per_priority_fulfilled": per_priority_fulfilled,
-            "capacity_total": cap_total,
-            "capacity_remaining_total": cap_remaining,
-            "filler_assignments": filler_count,
-            "unfilled_workshops_count": len(unfilled),
-            "warning_capacity_deficit": max(0, (len(pids_all) * num_assign) - cap_total),
-            "all_filled_to_slots": all(len(assignments[pid]) == num_assign for pid in pids_all),
-            "happy_index": quality["happy_mean"],
-            "min_user_happy": quality["min_user_happy"],
-            "median_user_happy": quality["median_user_happy"],
-            "gini_dissatisfaction": quality["gini_dissatisfaction"],
-            "jain_index": quality["jain_index"],
-            "top1_coverage": quality["top1_coverage"],
-            "no_topk_rate": quality["no_topk_rate"],
-            "topk_coverage_hist": quality["topk_coverage_hist"],
-            "objective": objective,
-        }
+        summary, unfilled = _summarize_assignments(assignments, participants, workshops, cap_per_slot,
+                                                   w_full, topk, num_assign, num_wishes)
+        summary["seed"] = base_seed
+        summary["seed_run"] = seed_val
+        summary["objective"] = objective
         meta = {"unfilled_workshops": unfilled}
-        return assignments, {"summary": summary, **meta}
+        return (assignments, {"summary": summary, **meta}), 0
 
-    # Seeds vorbereiten
-    base_seed = (cfg.get("seed") or "").strip()
-    seed_list: List[Optional[str]] = []
-    if base_seed:
-        seed_list.append(base_seed)
-    want = max(1, seeds - len(seed_list))
-    for i in range(want):
-        seed_list.append(f"AUTOSEED_{i+1}")
+    # Seeds vorbereiten: alle Läufe aus dem einen (aufgelösten) Seed abgeleitet
+    seed_list: List[str] = [base_seed]
+    for i in range(1, max(1, seeds)):
+        seed_list.append(f"{base_seed}#{i}")
 
+    stop_at_bound = bool(cfg.get("stop_at_bound")) and bounds is not None
     best = None
     best_key = None
-    for sv in seed_list:
-        cand = single_run(sv)
+    completed = 0
+    pruned_after: Counter = Counter()
+    for i, sv in enumerate(seed_list, start=1):
+        cand, pruned_round = single_run(sv, best_key)
+        if cand is None:
+            pruned_after[pruned_round] += 1
+            yield {"event": "seed_pruned", "seed_run": sv, "index": i, "of": len(seed_list),
+                   "round": pruned_round, "best_seed_run": best[1]["summary"]["seed_run"], "best_key": list(best_key)}
+            continue
+        completed += 1
         s = cand[1]["summary"]
-        if objective == "fair_maxmin":
-            key = (-round(s.get("min_user_happy", 0.0), 4),
-                   -round(s.get("median_user_happy", 0.0), 4),
-                   round(s.get("gini_dissatisfaction", 1.0), 4))
-        elif objective == "leximin":
-            key = (-round(s.get("min_user_happy", 0.0), 4),
-                   round(s.get("gini_dissatisfaction", 1.0), 4),
-                   -round(s.get("happy_index", 0.0), 4))
-        else:  # happy_mean
-            key = (-round(s.get("happy_index", 0.0), 4),
-                   -round(s.get("median_user_happy", 0.0), 4),
-                   round(s.get("gini_dissatisfaction", 1.0), 4))
+        key = _fair_key(objective, s)
         if (best_key is None) or (key < best_key):
             best_key = key
             best = cand
+        yield {"event": "seed", "seed_run": sv, "index": i, "of": len(seed_list),
+               "objective": objective, "key": list(key),
+               "happy_index": s.get("happy_index"), "min_user_happy": s.get("min_user_happy"),
+               "best_seed_run": best[1]["summary"]["seed_run"], "best_key": list(best_key)}
+        if stop_at_bound and _at_bound(objective, best[1]["summary"], bounds):
+            best[1]["summary"]["stopped_at_bound"] = True
+            best[1]["summary"]["seeds_run"] = i
+            yield {"event": "bound_reached", "seed_run": best[1]["summary"]["seed_run"], "index": i, "of": len(seed_list)}
+            break
+    best[1]["summary"]["seeds_completed"] = completed
+    best[1]["summary"]["seeds_pruned"] = sum(pruned_after.values())
+    best[1]["summary"]["seeds_pruned_after_round"] = dict(pruned_after)
     return best
 
 # --------------------------------------------------------------------------------------
@@ -739,12 +1422,17 @@ def run_matching_fair(participants: Dict[str, 'Participant'],
 # --------------------------------------------------------------------------------------
 def run_matching_solver(participants: Dict[str, 'Participant'],
                         workshops: Dict[str, 'Workshop'],
-                        cfg: Dict[str, Any]) -> Tuple[Dict[str, Dict[int, str]], Dict[str, Any]]:
+                        cfg: Dict[str, Any]) -> MatchResult:
+    return drain(iter_matching_solver(participants, workshops, cfg))
+
+def iter_matching_solver(participants: Dict[str, 'Participant'],
+                         workshops: Dict[str, 'Workshop'],
+                         cfg: Dict[str, Any]) -> MatchProgress:
+    """Solver als Generator: ein Event pro fertigem Slot."""
     num_assign = cfg["num_assign"]
     num_wishes = cfg["num_wishes"]
     topk = num_assign if cfg.get("topk_equals_slots", True) else min(num_assign, num_wishes)
-    seed = (cfg.get("seed") or "").strip()
-    rng = random.Random(seed or None)
+    seed = _resolve_seed(cfg)
 
     # Weights bauen (wie bei fair)
     weights = cfg.get("weights")
@@ -757,111 +1445,994 @@ def run_matching_solver(participants: Dict[str, 'Participant'],
     weights = _extend_weights({int(k): float(v) for k, v in weights.items()}, topk)
 
     cap_per_slot: Dict[int, Dict[str, int]] = {s: {w.id: w.capacity for w in workshops.values()} for s in range(1, num_assign + 1)}
-    pids = list(participants.keys()); rng.shuffle(pids)
+    # Index pro Slot: nur Workshops mit Restkapazität (Reihenfolge wie workshops) → Fallback ohne Vollscan
+    open_per_slot: Dict[int, Dict[str, None]] = {s: {wid: None for wid, rest in caps.items() if rest > 0}
+                                                 for s, caps in cap_per_slot.items()}
+    pids = list(participants.keys()); _rng(seed, "order").shuffle(pids)
     assignments: Dict[str, Dict[int, str]] = {pid: {} for pid in pids}
 
+    # Happy-Score inkrementell pro Person (statt compute_happy_index über alle je Iteration)
+    w_last = weights[max(weights.keys())] if weights else 0.0
+    weight_sum = sum(weights.get(r, w_last) for r in range(1, topk + 1)) or 1.0
+    raw_score: Dict[str, float] = {pid: 0.0 for pid in pids}
+
+    def happy_of(pid: str) -> float:
+        return raw_score[pid] / weight_sum if topk else 0.0
+
     def best_available_for(pid: str, s: int) -> Optional[str]:
+        caps = cap_per_slot[s]
+        held = assignments[pid].values()
         # 1) Top-k Wünsche zuerst
         for wid in participants[pid].wishes[:topk]:
-            if wid in assignments[pid].values():
-                continue
-            if cap_per_slot[s].get(wid, 0) > 0:
+            if wid not in held and caps.get(wid, 0) > 0:
                 return wid
         # 2) restliche Wünsche bis num_wishes
-        for wid in participants[pid].wishes[:num_wishes]:
-            if wid in assignments[pid].values():
-                continue
-            if cap_per_slot[s].get(wid, 0) > 0:
+        for wid in participants[pid].wishes[topk:num_wishes]:
+            if wid not in held and caps.get(wid, 0) > 0:
                 return wid
-        # 3) Fallback
-        for wid, rest in cap_per_slot[s].items():
-            if rest > 0 and wid not in assignments[pid].values():
+        # 3) Fallback: nur offene Workshops dieses Slots
+        for wid in open_per_slot[s]:
+            if wid not in held:
                 return wid
         return None
 
-    def current_per_user_happy() -> Dict[str, float]:
-        _, pu = compute_happy_index(assignments, {k: v.wishes for k, v in participants.items()}, weights, topk)
-        return pu
-
+    def assign(pid: str, s: int, wid: str) -> None:
+        assignments[pid][s] = wid
+        cap_per_slot[s][wid] -= 1
+        if cap_per_slot[s][wid] <= 0:
+            open_per_slot[s].pop(wid, None)
+        wl = participants[pid].wishes[:topk]
+        if wid in wl:
+            rank = wl.index(wid) + 1
+            raw_score[pid] += weights.get(rank, w_last)
+
+    # Leximin-Heuristik pro Slot über einen Heap (Happy, Anzahl Zuteilungen, Tie-Break):
+    # Schlüssel ändern sich nur für die gerade zugeteilte Person → O(N log N) pro Slot.
     for s in range(1, num_assign + 1):
-        while True:
-            needed = [pid for pid in pids if s not in assignments[pid]]
-            if not needed:
-                break
-            per_user_h = current_per_user_happy()
-            needed.sort(key=lambda pid: (per_user_h.get(pid, 0.0), len(assignments[pid]), rng.random()))
-            progress = 0
-            for pid in needed:
-                wid = best_available_for(pid, s)
-                if wid is None:
-                    continue
-                assignments[pid][s] = wid
-                cap_per_slot[s][wid] -= 1
-                progress += 1
-            if progress == 0:
-                break
-        rng.shuffle(pids)
+        # Eigener Stream pro Slot (statt die geteilte pids-Liste zwischen Slots umzumischen)
+        slot_rng = _rng(seed, "slot", s)
+        slot_order = pids[:]; slot_rng.shuffle(slot_order)
+        heap = [(happy_of(pid), len(assignments[pid]), slot_rng.random(), pid)
+                for pid in slot_order if s not in assignments[pid]]
+        heapq.heapify(heap)
+        placed = 0
+        while heap:
+            _, _, _, pid = heapq.heappop(heap)
+            wid = best_available_for(pid, s)
+            if wid is not None:
+                assign(pid, s, wid)
+                placed += 1
+        yield {"event": "slot", "slot": s, "of": num_assign, "placed": placed}
+
+    summary, unfilled = _summarize_assignments(assignments, participants, workshops, cap_per_slot,
+                                               weights, topk, num_assign, num_wishes)
+    summary["seed"] = seed
+    summary["objective"] = (cfg.get("objective") or "leximin").strip().lower()
+    meta = {"unfilled_workshops": unfilled}
+    return assignments, {"summary": summary, **meta}
 
-    quality = compute_quality_metrics(assignments, participants, weights, topk, num_assign)
-    per_slot_counts = {s: len([1 for pid in pids if assignments[pid].get(s)]) for s in range(1, num_assign + 1)}
-    assign_dist = Counter([len(assignments[pid]) for pid in pids])
-    cap_total = sum(w.capacity for w in workshops.values()) * num_assign
-    cap_remaining = sum(sum(max(0, x) for x in cap_per_slot[s].values()) for s in cap_per_slot)
+# --------------------------------------------------------------------------------------
+# Private Ablage: Pickle nur aus eigenen, für andere nicht beschreibbaren Verzeichnissen
+# --------------------------------------------------------------------------------------
+def _private_dir(path: str) -> None:
+    """
+    Verzeichnis mit 0700 anlegen bzw. prüfen. Gehört es einem anderen User (z. B. unter
+    /tmp vorab angelegt), wird es nicht benutzt – pickle.load aus fremden Dateien wäre
+    Codeausführung im Service.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or (hasattr(os, "getuid") and st.st_uid != os.getuid()):
+        raise PermissionError(f"{path}: kein eigenes Verzeichnis – Ablage verweigert.")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+def _load_private_pickle(path: str) -> Any:
+    """Pickle laden, wenn Verzeichnis und Datei dem Service-User gehören; sonst None."""
+    try:
+        _private_dir(os.path.dirname(path))
+        with open(path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            if (hasattr(os, "getuid") and st.st_uid != os.getuid()) or st.st_mode & 0o022:
+                return None
+            return pickle.load(fh)
+    except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+        return None
 
-    filler_count = 0
-    for pid in pids:
-        for s_idx, wid in assignments[pid].items():
-            if wid not in participants[pid].wishes[:num_wishes]:
-                filler_count += 1
+# --------------------------------------------------------------------------------------
+# Run-Log & Replay
+# --------------------------------------------------------------------------------------
+@dataclass
+class RunRecord:
+    run_id: str
+    created_at: float
+    snap: 'Snapshot'
+    cfg: Dict[str, Any]
+    strategy: str
+    seed: str
+    digest: str
+    summary: Dict[str, Any]
+    # Ergebnis nur für die letzten RUN_RESULTS_KEEP Läufe (Speicher), ältere nur noch replaybar
+    assignments: Optional[Dict[str, Dict[int, str]]] = None
+    unfilled: Optional[List[Dict[str, Any]]] = None
+
+_RUN_LOG: "OrderedDict[str, RunRecord]" = OrderedDict()
+_RUN_LOG_LOCK = threading.Lock()
+
+def _assignment_digest(assignments: Dict[str, Dict[int, str]]) -> str:
+    rows = sorted((pid, int(s), wid) for pid, slots in assignments.items() for s, wid in slots.items())
+    return hashlib.sha256(json.dumps(rows, separators=(",", ":")).encode()).hexdigest()[:16]
+
+def log_run(snap: 'Snapshot', cfg: Dict[str, Any], strategy: str,
+            assignments: Dict[str, Dict[int, str]], summary: Dict[str, Any],
+            unfilled: Optional[List[Dict[str, Any]]] = None) -> RunRecord:
+    rec = RunRecord(run_id=secrets.token_hex(8), created_at=time.time(), snap=snap, cfg=dict(cfg),
+                    strategy=strategy, seed=str(cfg.get("seed") or ""),
+                    digest=_assignment_digest(assignments), summary=summary,
+                    assignments=assignments, unfilled=unfilled)
+    with _RUN_LOG_LOCK:
+        _RUN_LOG[rec.run_id] = rec
+        while len(_RUN_LOG) > RUN_LOG_SIZE:
+            _RUN_LOG.popitem(last=False)
+        for old in list(_RUN_LOG.values())[:-RUN_RESULTS_KEEP]:
+            old.assignments = old.unfilled = None
+    RUN_STORE.save(rec)
+    return rec
+
+def get_run(run_id: str) -> RunRecord:
+    with _RUN_LOG_LOCK:
+        rec = _RUN_LOG.get(run_id)
+    if rec is None or rec.assignments is None:
+        # Lauf eines anderen gunicorn-Workers (bzw. dort noch mit Ergebnis) → aus RUN_DIR
+        stored = RUN_STORE.load(run_id)
+        if stored is not None and (rec is None or stored.assignments is not None):
+            rec = stored
+    if rec is None:
+        raise NotFoundError(f"Run '{run_id}' nicht (mehr) im Run-Log.")
+    return rec
+
+class RunStore:
+    """
+    Run-Log auf Platte (RUN_DIR), damit /matching/runs/<id> und /matching/replay/<id>
+    auch den Lauf eines anderen gunicorn-Workers finden. Pro Lauf eine Datei mit den
+    Metadaten, das Ergebnis (Zuteilung) getrennt nur für die letzten RUN_RESULTS_KEEP
+    Läufe; Snapshots einmal pro geladenem Snapshot, von mehreren Läufen geteilt.
+    Aufräumen nach mtime (Snapshots, die älter sind als der älteste behaltene Lauf,
+    werden von keinem Lauf mehr gebraucht – jeder Lauf frischt seinen Snapshot auf).
+    Verzeichnis 0700, geladen werden nur eigene Dateien (siehe _load_private_pickle).
+    """
 
-    unfilled = []
+    def __init__(self, directory: str):
+        self._dir = directory
+
+    def _file(self, kind: str, name: str) -> str:
+        return os.path.join(self._dir, f"{kind}-{name}.pkl")
+
+    @staticmethod
+    def _snap_name(snap: 'Snapshot') -> str:
+        return hashlib.sha256(f"{snap.event}|{snap.digest}|{snap.loaded_at!r}".encode()).hexdigest()[:16]
+
+    def _write(self, path: str, obj: Any) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _read(self, path: str) -> Any:
+        return _load_private_pickle(path)
+
+    def save(self, rec: RunRecord) -> None:
+        if not self._dir:
+            return
+        try:
+            _private_dir(self._dir)
+            snap_name = self._snap_name(rec.snap)
+            meta = {k: v for k, v in vars(rec).items() if k not in ("snap", "assignments", "unfilled")}
+            self._write(self._file("run", rec.run_id), {**meta, "snap_name": snap_name})
+            # Snapshot nach dem Lauf schreiben/auffrischen → mtime nie älter als der Lauf
+            snap_path = self._file("snap", snap_name)
+            if os.path.exists(snap_path):
+                os.utime(snap_path)
+            else:
+                self._write(snap_path, rec.snap)
+            if rec.assignments is not None:
+                self._write(self._file("result", rec.run_id), (rec.assignments, rec.unfilled))
+            self._evict()
+        except OSError:
+            pass
+
+    def load(self, run_id: str) -> Optional[RunRecord]:
+        if not self._dir or not run_id.isalnum():
+            return None
+        meta = self._read(self._file("run", run_id))
+        if meta is None:
+            return None
+        snap = self._read(self._file("snap", meta.pop("snap_name")))
+        if snap is None:
+            return None
+        result = self._read(self._file("result", run_id)) or (None, None)
+        return RunRecord(snap=snap, assignments=result[0], unfilled=result[1], **meta)
+
+    def _evict(self) -> None:
+        def by_age(kind: str) -> List[Tuple[float, str]]:
+            out = []
+            for f in os.listdir(self._dir):
+                if f.startswith(kind + "-") and f.endswith(".pkl"):
+                    try:
+                        out.append((os.path.getmtime(os.path.join(self._dir, f)), f))
+                    except OSError:
+                        pass
+            return sorted(out)
+
+        def remove(names: List[str]) -> None:
+            for f in names:
+                try:
+                    os.remove(os.path.join(self._dir, f))
+                except OSError:
+                    pass
+
+        runs = by_age("run")
+        remove([f for _, f in runs[:-RUN_LOG_SIZE]])
+        remove([f for _, f in by_age("result")[:-RUN_RESULTS_KEEP]])
+        kept = runs[-RUN_LOG_SIZE:]
+        if kept:
+            remove([f for t, f in by_age("snap") if t < kept[0][0]])
+
+RUN_STORE = RunStore(RUN_DIR)
+
+# --------------------------------------------------------------------------------------
+# What-if: Kapazitätsänderungen auf Basis einer Baseline-Zuteilung reparieren
+# --------------------------------------------------------------------------------------
+WHATIF_METRICS = ("happy_index", "min_user_happy", "filler_assignments", "unfilled_workshops_count")
+
+def _topk_for(cfg: Dict[str, Any]) -> int:
+    num_assign = int(cfg["num_assign"])
+    return num_assign if cfg.get("topk_equals_slots", True) else min(num_assign, int(cfg["num_wishes"]))
+
+def _weights_for(cfg: Dict[str, Any], topk: int) -> Dict[int, float]:
+    weights = cfg.get("weights")
+    if not weights:
+        wm = (cfg.get("weights_mode") or "").strip().lower()
+        if wm:
+            weights = _gen_weights(wm, int(cfg["num_wishes"]), base=float(cfg.get("weights_base", 0.8)), linear_min=float(cfg.get("linear_min", 0.2)))
+        else:
+            weights = SERVICE_DEFAULTS["weights"]
+    return _extend_weights({int(k): float(v) for k, v in weights.items()}, topk)
+
+def repair_assignments(base: Dict[str, Dict[int, str]],
+                       participants: Dict[str, 'Participant'],
+                       workshops: Dict[str, 'Workshop'],
+                       cfg: Dict[str, Any], *,
+                       capacity_deltas: Optional[Dict[str, int]] = None,
+                       remove: Optional[List[str]] = None,
+                       reassign: Optional[List[str]] = None) -> Tuple[Dict[str, Dict[int, str]], Dict[str, 'Workshop'], Dict[int, Dict[str, int]], int]:
+    """
+    Baseline-Zuteilung an geänderte Kapazitäten anpassen, ohne neu zu matchen:
+    1) Workshops entfernen / Kapazität ändern; Personen aus `reassign` (neue oder
+       geänderte Wunschliste) verlieren ihre Plätze, nicht mehr vorhandene fallen weg,
+    2) Überbelegung auflösen (die Zufriedensten weichen zuerst),
+    3) Verdrängte neu platzieren (Benachteiligte zuerst),
+    4) freie Plätze für Upgrades nutzen (besserer Wunsch im selben Slot),
+    5) leere Slots auffüllen.
+    Rückgabe: (assignments, workshops, cap_per_slot, geänderte Slot-Zuteilungen)
+    """
+    num_assign = int(cfg["num_assign"])
+    num_wishes = int(cfg["num_wishes"])
+    topk = _topk_for(cfg)
+    weights = _weights_for(cfg, topk)
+    weight_sum = sum(weights.get(r, 0.0) for r in range(1, topk + 1)) or 1.0
+    removed = set(remove or [])
+    deltas = capacity_deltas or {}
+
+    ws: Dict[str, Workshop] = {}
     for wid, w in workshops.items():
-        remaining_total = sum(cap_per_slot[s][wid] for s in cap_per_slot)
-        if remaining_total > 0:
-            unfilled.append({"id": wid, "title": w.title, "remaining": remaining_total})
+        if wid in removed:
+            continue
+        ws[wid] = Workshop(id=w.id, title=w.title, capacity=max(0, w.capacity + int(deltas.get(wid, 0))),
+                           capacity_field_used=w.capacity_field_used)
 
-    per_priority_fulfilled = dict({i: 0 for i in range(1, num_wishes + 1)})
-    for pid in pids:
-        wish_list = participants[pid].wishes[:num_wishes]
-        for s_idx, wid in assignments[pid].items():
-            if wid in wish_list:
-                prio = wish_list.index(wid) + 1
-                per_priority_fulfilled[prio] = per_priority_fulfilled.get(prio, 0) + 1
+    redo = {pid for pid in (reassign or ()) if pid in participants}
+    redo.update(pid for pid in participants if pid not in base)
+    assignments = {pid: {s: wid for s, wid in slots.items() if wid in ws}
+                   for pid, slots in base.items() if pid in participants and pid not in redo}
+    displaced = [(pid, s) for pid, slots in base.items() if pid in assignments
+                 for s, wid in slots.items() if wid not in ws]
+    assignments.update({pid: {} for pid in redo})
+    displaced.extend((pid, s) for pid in sorted(redo) for s in range(1, num_assign + 1))
 
-    summary = {
-        "seed": seed or "random",
-        "participants_total": len(pids),
-        "participants_no_wishes": len([1 for p in participants.values() if not p.wishes]),
-        "assignments_total": sum(len(v) for v in assignments.values()),
-        "target_assignments_total": len(pids) * num_assign,
-        "assignment_distribution": dict(assign_dist),
-        "per_slot_assigned_counts": per_slot_counts,
-        "per_priority_fulfilled": per_priority_fulfilled,
-        "capacity_total": cap_total,
-        "capacity_remaining_total": cap_remaining,
-        "filler_assignments": filler_count,
-        "unfilled_workshops_count": len(unfilled),
-        "warning_capacity_deficit": max(0, (len(pids) * num_assign) - cap_total),
-        "all_filled_to_slots": all(len(assignments[pid]) == num_assign for pid in pids),
-        "happy_index": quality["happy_mean"],
-        "min_user_happy": quality["min_user_happy"],
-        "median_user_happy": quality["median_user_happy"],
-        "gini_dissatisfaction": quality["gini_dissatisfaction"],
-        "jain_index": quality["jain_index"],
-        "top1_coverage": quality["top1_coverage"],
-        "no_topk_rate": quality["no_topk_rate"],
-        "topk_coverage_hist": quality["topk_coverage_hist"],
-        "objective": (cfg.get("objective") or "leximin").strip().lower(),
+    rank = {pid: {wid: i + 1 for i, wid in enumerate(p.wishes[:num_wishes])} for pid, p in participants.items()}
+
+    def score(pid: str) -> float:
+        rk = rank.get(pid, {})
+        return sum(weights.get(rk[wid], 0.0) for wid in assignments[pid].values() if rk.get(wid, topk + 1) <= topk) / weight_sum
+
+    holders: Dict[int, Dict[str, List[str]]] = {s: defaultdict(list) for s in range(1, num_assign + 1)}
+    for pid, slots in assignments.items():
+        for s, wid in slots.items():
+            holders[s][wid].append(pid)
+    cap_per_slot = {s: {wid: w.capacity - len(holders[s].get(wid, ())) for wid, w in ws.items()} for s in range(1, num_assign + 1)}
+
+    # 2) Überbelegung auflösen
+    for s in cap_per_slot:
+        for wid, rest in cap_per_slot[s].items():
+            if rest >= 0:
+                continue
+            for pid in sorted(holders[s][wid], key=score, reverse=True)[:-rest]:
+                del assignments[pid][s]
+                displaced.append((pid, s))
+            cap_per_slot[s][wid] = 0
+
+    def place(pid: str, s: int) -> bool:
+        held = set(assignments[pid].values())
+        for wid in participants[pid].wishes[:num_wishes]:
+            if wid not in held and cap_per_slot[s].get(wid, 0) > 0:
+                break
+        else:
+            wid = next((w for w, rest in cap_per_slot[s].items() if rest > 0 and w not in held), None)
+        if wid is None:
+            return False
+        assignments[pid][s] = wid
+        cap_per_slot[s][wid] -= 1
+        return True
+
+    # 3) Verdrängte neu platzieren
+    for pid, s in sorted(displaced, key=lambda x: score(x[0])):
+        place(pid, s)
+
+    # 4) Upgrades: freie Plätze an Wünschende mit schlechterer Zuteilung im selben Slot
+    wishers: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+    for pid, rk in rank.items():
+        for wid, r in rk.items():
+            wishers[wid].append((pid, r))
+    # Nur Plätze aus dem Szenario bzw. von Neu-Platzierten freigegebene (plus Ketten daraus)
+    # – ein leeres Szenario liefert exakt die Baseline
+    freed = {(s, wid) for pid in redo for s, wid in base.get(pid, {}).items() if wid in ws}
+    todo = deque((s, wid) for s in cap_per_slot for wid, d in deltas.items() if d > 0 and wid in ws)
+    todo.extend(sorted(freed))
+    while todo:
+        s, wid = todo.popleft()
+        if cap_per_slot[s].get(wid, 0) <= 0:
+            continue
+        cands = []
+        for pid, r in wishers.get(wid, ()):
+            if pid not in assignments or wid in assignments[pid].values():
+                continue
+            cur = assignments[pid].get(s)
+            if cur is None or r < rank[pid].get(cur, num_wishes + 1):
+                cands.append((score(pid), r, pid))
+        for _, _, pid in sorted(cands)[:cap_per_slot[s][wid]]:
+            old = assignments[pid].get(s)
+            assignments[pid][s] = wid
+            cap_per_slot[s][wid] -= 1
+            if old is not None:
+                cap_per_slot[s][old] += 1
+                todo.append((s, old))
+
+    # 5) Leere Slots auffüllen
+    for s in range(1, num_assign + 1):
+        for pid in sorted((pid for pid in assignments if s not in assignments[pid]), key=score):
+            place(pid, s)
+
+    changed = sum(1 for pid, slots in base.items() for s, wid in slots.items() if assignments.get(pid, {}).get(s) != wid)
+    changed += sum(1 for pid, slots in assignments.items() for s in slots if s not in base.get(pid, {}))
+    return assignments, ws, cap_per_slot, changed
+
+_BASELINES: Dict[Tuple[str, float, str], Tuple[Dict[str, Any], str, Dict[str, Dict[int, str]], Dict[str, Any]]] = {}
+_BASELINE_LOCK = threading.Lock()
+BASELINE_MAX = 16
+
+def get_baseline(snap: 'Snapshot', cfg: Dict[str, Any], overrides: Dict[str, Any],
+                 diag: Dict[str, Any]) -> Tuple[str, Dict[str, Dict[int, str]], Dict[str, Any]]:
+    """Baseline-Zuteilung pro (Snapshot, Overrides) einmal rechnen und wiederverwenden."""
+    key = (snap.event, snap.loaded_at, json.dumps(overrides, sort_keys=True, default=str))
+    with _BASELINE_LOCK:
+        hit = _BASELINES.get(key)
+    if hit is not None:
+        diag["baseline"] = {"cached": True}
+        return hit[1], hit[2], hit[3]
+    strategy, assignments, meta = _run_strategy(snap, cfg)
+    with _BASELINE_LOCK:
+        _BASELINES[key] = (cfg, strategy, assignments, meta["summary"])
+        while len(_BASELINES) > BASELINE_MAX:
+            _BASELINES.pop(next(iter(_BASELINES)))
+    diag["baseline"] = {"cached": False}
+    return strategy, assignments, meta["summary"]
+
+def evaluate_what_if(snap: 'Snapshot', cfg: Dict[str, Any],
+                     base: Dict[str, Dict[int, str]],
+                     base_summary: Dict[str, Any],
+                     scenario: Dict[str, Any]) -> Dict[str, Any]:
+    deltas_in = scenario.get("capacity_deltas") or {}
+    remove = [str(w) for w in (scenario.get("remove") or [])]
+    unknown = sorted({str(w) for w in list(deltas_in) + remove if str(w) not in snap.workshops})
+    deltas = {str(w): int(d) for w, d in deltas_in.items() if str(w) in snap.workshops}
+
+    t0 = time.perf_counter()
+    assignments, ws, cap_per_slot, changed = repair_assignments(
+        base, snap.participants, snap.workshops, cfg,
+        capacity_deltas=deltas, remove=[w for w in remove if w in snap.workshops])
+    topk = _topk_for(cfg)
+    summary, unfilled = _summarize_assignments(assignments, snap.participants, ws, cap_per_slot,
+                                               _weights_for(cfg, topk), topk,
+                                               int(cfg["num_assign"]), int(cfg["num_wishes"]))
+    metrics = {k: summary[k] for k in WHATIF_METRICS}
+    return {
+        "name": scenario.get("name"),
+        "capacity_deltas": deltas,
+        "remove": [w for w in remove if w in snap.workshops],
+        "unknown_workshops": unknown,
+        "metrics": metrics,
+        "delta": {k: round(metrics[k] - base_summary[k], 4) for k in WHATIF_METRICS},
+        "changed_assignments": changed,
+        "unfilled_workshops": unfilled,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
     }
-    meta = {"unfilled_workshops": unfilled}
-    return assignments, {"summary": summary, **meta}
+
+# --------------------------------------------------------------------------------------
+# Vorprüfung: Machbarkeit & obere Schranken (ohne Strategie-Lauf)
+# --------------------------------------------------------------------------------------
+PRECHECK_SAMPLE = 20
+
+def compute_bounds(participants: Dict[str, 'Participant'],
+                   workshops: Dict[str, 'Workshop'],
+                   cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Schnelle Analyse der Eingabe, linear in der Zahl der Wünsche:
+    - Kapazität vs. Bedarf pro Slot,
+    - Teilnehmende mit weniger gültigen Wünschen als Slots,
+    - überbuchte Workshops und Hall-Defizite (Gruppen, deren Top-k-Wünsche
+      alle in denselben gefragten Workshops liegen),
+    - obere Schranken für happy_mean/min_user_happy aus einer Relaxation
+      (Slots ignoriert, jeder Workshop hat capacity·num_assign Plätze).
+    """
+    num_assign = int(cfg["num_assign"])
+    num_wishes = int(cfg["num_wishes"])
+    topk = _topk_for(cfg)
+    weights = _weights_for(cfg, topk)
+    w_last = weights[max(weights.keys())] if weights else 0.0
+    weight_sum = sum(weights.get(r, w_last) for r in range(1, topk + 1)) or 1.0
+    seats = {wid: max(0, w.capacity) * num_assign for wid, w in workshops.items()}
+    n = len(participants)
+
+    # Pro Person: gültige (existierend, Kapazität > 0) Wünsche, Top-k mit Gewicht
+    topk_by_pid: Dict[str, List[Tuple[str, float]]] = {}
+    wishers: Dict[str, List[float]] = defaultdict(list)
+    user_max: Dict[str, float] = {}
+    short: List[Dict[str, Any]] = []
+    short_count = no_wishes = invalid_refs = 0
+    for pid, p in participants.items():
+        valid: List[str] = []
+        for wid in p.wishes[:num_wishes]:
+            if seats.get(wid, 0) <= 0:
+                invalid_refs += 1
+            elif wid not in valid:
+                valid.append(wid)
+        if not p.wishes:
+            no_wishes += 1
+        if len(valid) < num_assign:
+            short_count += 1
+            if len(short) < PRECHECK_SAMPLE:
+                short.append({"id": pid, "valid_wishes": len(valid)})
+        ranked: List[Tuple[str, float]] = []
+        seen = set()
+        for rank, wid in enumerate(p.wishes[:topk], start=1):
+            if seats.get(wid, 0) > 0 and wid not in seen:
+                seen.add(wid)
+                wt = weights.get(rank, w_last)
+                ranked.append((wid, wt))
+                wishers[wid].append(wt)
+        topk_by_pid[pid] = ranked
+        user_max[pid] = sum(wt for _, wt in ranked) / weight_sum if topk else 0.0
+
+    # Schranke 1: jede Person bekommt alle gültigen Top-k-Wünsche
+    ub_participant = sum(user_max.values())
+    # Schranke 2: jeder Workshop füllt seine Plätze mit den höchstgewichteten Wünschen
+    ub_capacity = sum(sum(heapq.nlargest(seats[wid], wts)) for wid, wts in wishers.items()) / weight_sum if topk else 0.0
+    happy_ub = min(ub_participant, ub_capacity) / n if n else 0.0
+    min_ub = min(user_max.values()) if user_max else 0.0
+
+    slot_capacity = sum(max(0, w.capacity) for w in workshops.values())
+    slots = [{"slot": s, "capacity": slot_capacity, "demand": n, "deficit": max(0, n - slot_capacity)}
+             for s in range(1, num_assign + 1)]
+
+    # Überbuchung pro Workshop (Top-k-Nachfrage vs. Plätze über alle Slots)
+    ratio = {wid: len(wts) / seats[wid] for wid, wts in wishers.items()}
+    oversubscribed = [{"id": wid, "title": workshops[wid].title, "topk_demand": len(wishers[wid]),
+                       "seats": seats[wid], "excess": len(wishers[wid]) - seats[wid]}
+                      for wid in sorted(ratio, key=ratio.get, reverse=True) if len(wishers[wid]) > seats[wid]]
+
+    # Hall-Präfixe: Workshops nach Überbuchung sortiert; S_j = die j gefragtesten.
+    # Personen, deren Top-k-Wünsche alle in S_j liegen, brauchen mehr Plätze als S_j hat → Defizit.
+    order = sorted(ratio, key=ratio.get, reverse=True)
+    pos = {wid: i for i, wid in enumerate(order)}
+    demand_at: List[int] = [0] * (len(order) + 1)
+    people_at: List[int] = [0] * (len(order) + 1)
+    for ranked in topk_by_pid.values():
+        if ranked:
+            j = max(pos[wid] for wid, _ in ranked)
+            demand_at[j] += len(ranked)
+            people_at[j] += 1
+    hall: List[Dict[str, Any]] = []
+    demand = people = seat_sum = 0
+    for j, wid in enumerate(order):
+        demand += demand_at[j]; people += people_at[j]; seat_sum += seats[wid]
+        if demand > seat_sum:
+            hall.append({"workshops": order[:j + 1], "participants": people,
+                         "topk_demand": demand, "seats": seat_sum, "deficit": demand - seat_sum})
+    hall.sort(key=lambda h: -h["deficit"])
+
+    return {
+        "participants": n,
+        "workshops": len(workshops),
+        "num_assign": num_assign,
+        "topk": topk,
+        "feasible": all(sl["deficit"] == 0 for sl in slots),
+        "slots": slots,
+        "participants_short": {"count": short_count, "no_wishes": no_wishes, "sample": short},
+        "invalid_wish_refs": invalid_refs,
+        "oversubscribed": oversubscribed[:PRECHECK_SAMPLE],
+        "oversubscribed_count": len(oversubscribed),
+        "hall_deficits": hall[:5],
+        "bounds": {
+            "happy_mean_ub": round(happy_ub, 4),
+            "min_user_happy_ub": round(min_ub, 4),
+            "happy_mean_ub_participant": round(ub_participant / n, 4) if n else 0.0,
+            "happy_mean_ub_capacity": round(ub_capacity / n, 4) if n else 0.0,
+        },
+    }
+
+def bound_gap(summary: Dict[str, Any], bounds: Dict[str, Any]) -> Dict[str, Any]:
+    """Abstand eines Ergebnisses zu den Schranken (0 = beweisbar optimal in dieser Kennzahl)."""
+    b = bounds["bounds"]
+    return {"happy_mean_ub": b["happy_mean_ub"], "min_user_happy_ub": b["min_user_happy_ub"],
+            "happy_mean_gap": round(max(0.0, b["happy_mean_ub"] - summary.get("happy_index", 0.0)), 4),
+            "min_user_happy_gap": round(max(0.0, b["min_user_happy_ub"] - summary.get("min_user_happy", 0.0)), 4)}
+
+def _at_bound(objective: str, summary: Dict[str, Any], bounds: Dict[str, Any]) -> bool:
+    """Primäre Kennzahl des Objectives erreicht die Schranke (auf Key-Genauigkeit)."""
+    b = bounds["bounds"]
+    if objective == "happy_mean":
+        return summary.get("happy_index", 0.0) >= b["happy_mean_ub"]
+    return summary.get("min_user_happy", 0.0) >= b["min_user_happy_ub"]
+
+# --------------------------------------------------------------------------------------
+# Profiling (opt-in, PROFILING_ENABLED=1)
+# --------------------------------------------------------------------------------------
+_PROFILE_LOCK = threading.Lock()
+
+def _profile_hotspots(stats: pstats.Stats, top: int) -> List[Dict[str, Any]]:
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append({
+            "function": func,
+            "location": f"{os.path.basename(filename)}:{line}",
+            "ncalls": nc,
+            "tottime_ms": round(tt * 1000, 2),
+            "cumtime_ms": round(ct * 1000, 2),
+        })
+    rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+    return rows[:top]
+
+def _prune_profiles() -> None:
+    try:
+        files = sorted((os.path.join(PROFILE_DIR, f) for f in os.listdir(PROFILE_DIR) if f.endswith(".pstats")),
+                       key=os.path.getmtime)
+    except OSError:
+        return
+    for f in files[:-PROFILE_KEEP]:
+        try:
+            os.remove(f)
+        except OSError:
+            pass
+
+def run_profiled(fn: Callable[..., Any], *args: Any, diag: Dict[str, Any], **kwargs: Any) -> Any:
+    """
+    fn unter cProfile ausführen (im Worker-Thread, damit Fetch + Matching erfasst werden).
+    Hotspots landen in diag["profile"], die .pstats-Datei unter PROFILE_DIR.
+    """
+    # Immer nur ein Profil gleichzeitig (ab Python 3.12 ist der Profiler prozessweit)
+    with _PROFILE_LOCK:
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        result = prof.runcall(fn, *args, diag=diag, **kwargs)
+        total_ms = (time.perf_counter() - t0) * 1000
+    profile_id = secrets.token_hex(8)
+    entry: Dict[str, Any] = {"id": profile_id, "total_ms": round(total_ms, 1),
+                             "hotspots": _profile_hotspots(pstats.Stats(prof), PROFILE_TOP)}
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        prof.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.pstats"))
+        entry["download"] = f"/matching/profiles/{profile_id}.pstats"
+        _prune_profiles()
+    except OSError as e:
+        entry["store_error"] = str(e)
+    diag["profile"] = entry
+    return result
+
+# --------------------------------------------------------------------------------------
+# Antworten: schneller JSON-Encoder, Kompression, Spaltenformat
+# --------------------------------------------------------------------------------------
+JSON_ENCODER = "orjson" if orjson is not None else "json"
+
+def _json_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _negotiate_encoding(accept: str) -> Optional[str]:
+    """Accept-Encoding auswerten: br (falls verfügbar) vor gzip; q=0 respektieren."""
+    offered: Dict[str, float] = {}
+    for part in (accept or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            offered[token.strip().lower()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", offered.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+def _json_response(payload: Dict[str, Any], status: int = 200) -> Response:
+    """
+    JSON-Antwort mit Encode-Zeit und Größe in payload["diag"]["encode"].
+    Der Body wird ohne diag einmal kodiert, diag (klein) danach angehängt –
+    so stehen die echten Werte in der Antwort, ohne doppelt zu kodieren.
+    """
+    diag = dict(payload.get("diag") or {})
+    body_obj = {k: v for k, v in payload.items() if k != "diag"}
+    t0 = time.perf_counter()
+    body = _json_dumps(body_obj)
+    encode_ms = (time.perf_counter() - t0) * 1000
+    diag["encode"] = {"encoder": JSON_ENCODER, "encode_ms": round(encode_ms, 2), "body_bytes": len(body)}
+    diag_bytes = _json_dumps(diag)
+    body = (body[:-1] + b',"diag":' + diag_bytes + b"}") if len(body) > 2 else (b'{"diag":' + diag_bytes + b"}")
+
+    headers = {"Vary": "Accept-Encoding", "X-Encode-Ms": f"{encode_ms:.2f}", "X-Uncompressed-Bytes": str(len(body))}
+    encoding = _negotiate_encoding(request.headers.get("Accept-Encoding", "")) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding:
+        t1 = time.perf_counter()
+        if encoding == "br":
+            body = brotli.compress(body, quality=max(0, min(11, COMPRESS_LEVEL)))
+        else:
+            body = gzip.compress(body, compresslevel=max(1, min(9, COMPRESS_LEVEL)))
+        headers["Content-Encoding"] = encoding
+        headers["X-Compress-Ms"] = f"{(time.perf_counter() - t1) * 1000:.2f}"
+    return Response(body, status=status, mimetype="application/json", headers=headers)
+
+def _columnar_assignments(assignments: Dict[str, Dict[int, str]],
+                          workshops: Dict[str, 'Workshop']) -> Dict[str, Any]:
+    """
+    Kompaktes Spaltenformat: ID-Tabellen + parallele Arrays (Index Teilnehmende / Slot / Index Workshop).
+    Zeile i: participants[p[i]] ist in Slot slot[i] in workshops[w[i]].
+    """
+    participant_ids = list(assignments.keys())
+    ws_index: Dict[str, int] = {}
+    ws_ids: List[str] = []
+    col_p: List[int] = []
+    col_s: List[int] = []
+    col_w: List[int] = []
+    for pi, pid in enumerate(participant_ids):
+        for s, wid in sorted(assignments[pid].items()):
+            wi = ws_index.get(wid)
+            if wi is None:
+                wi = ws_index[wid] = len(ws_ids)
+                ws_ids.append(wid)
+            col_p.append(pi); col_s.append(s); col_w.append(wi)
+    return {
+        "format": "columnar",
+        "participants": participant_ids,
+        "workshops": ws_ids,
+        "workshop_titles": [workshops[wid].title if wid in workshops else "?" for wid in ws_ids],
+        "p": col_p,
+        "slot": col_s,
+        "w": col_w,
+    }
+
+# --------------------------------------------------------------------------------------
+# Pre-Matching im Hintergrund (opt-in, PREMATCH_ENABLED=1)
+# --------------------------------------------------------------------------------------
+class Prematcher:
+    """
+    Hält während der Anmeldephase pro Event ein aktuelles Ergebnis warm:
+    Delta-Fetch (changed > letzter Zyklus) + inkrementelle Reparatur der letzten
+    Zuteilung; jeder PREMATCH_FULL_EVERY-te Zyklus (und bei geänderter Config oder
+    Workshop-Liste) lädt alles neu und rechnet die Strategie komplett.
+
+    Nur ein gunicorn-Worker rechnet (flock auf PREMATCH_DIR/leader.lock), der
+    Zustand liegt als Pickle in PREMATCH_DIR (0700, nur eigene Dateien werden
+    geladen) und wird von allen Workern gelesen.
+    Budget: höchstens PREMATCH_CPU_SHARE CPU-Zeit (thread_time des Zyklus, ohne
+    Warten auf Drupal; der Abstand zwischen Zyklen wächst mit der Rechenzeit) und
+    PREMATCH_MAX_REQUESTS_PER_H Requests an Drupal.
+    """
+
+    def __init__(self, configs: List[str]):
+        self._keys = configs or [""]
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._leader_fh = None
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._requests: deque = deque()     # (Zeitpunkt, Anzahl) der letzten Stunde
+        self._due: Dict[str, float] = {}
+
+    # ---- Zustand (Datei, von allen Workern lesbar) ----
+    def _path(self, key: str) -> str:
+        return os.path.join(PREMATCH_DIR, f"state-{hashlib.sha256(key.encode()).hexdigest()[:12]}.pkl")
+
+    def state(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] == mtime:
+                return hit[1]
+        st = _load_private_pickle(path)
+        if st is None:
+            return None
+        with self._lock:
+            self._cache[key] = (mtime, st)
+        return st
+
+    def _save(self, key: str, st: Dict[str, Any]) -> None:
+        _private_dir(PREMATCH_DIR)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(st, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        with self._lock:
+            self._cache[key] = (os.stat(path).st_mtime_ns, st)
+
+    def warm(self, config_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Aktuelles Ergebnis für config_id (Schlüssel aus PREMATCH_CONFIGS oder aufgelöste UUID)."""
+        if not PREMATCH_ENABLED:
+            return None
+        cid = config_id or ""
+        for key in self._keys:
+            st = self.state(key)
+            if st is None or st.get("snap") is None:
+                continue
+            if cid != key and cid != (st.get("config_id") or ""):
+                continue
+            # Veraltet, wenn der Rechner-Worker zwei Zyklen überfällig ist
+            if time.time() > st.get("next_due", 0) + 2 * PREMATCH_INTERVAL_S:
+                return None
+            return st
+        return None
+
+    # ---- Hintergrund-Thread ----
+    def ensure_started(self) -> None:
+        # Lazy starten (erst nach dem gunicorn-Fork)
+        if not PREMATCH_ENABLED or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="prematch", daemon=True)
+                self._thread.start()
+
+    def _try_lead(self) -> bool:
+        if self._leader_fh is not None:
+            return True
+        _private_dir(PREMATCH_DIR)
+        fh = open(os.path.join(PREMATCH_DIR, "leader.lock"), "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                fh.close()
+                return False
+        self._leader_fh = fh
+        return True
+
+    def _requests_last_hour(self) -> int:
+        cutoff = time.time() - 3600
+        while self._requests and self._requests[0][0] < cutoff:
+            self._requests.popleft()
+        return sum(n for _, n in self._requests)
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                if not self._try_lead():
+                    time.sleep(PREMATCH_INTERVAL_S)
+                    continue
+            except Exception:
+                # z. B. PREMATCH_DIR nicht beschreibbar – später erneut versuchen
+                app.logger.exception("prematch: Leader-Lock fehlgeschlagen")
+                time.sleep(PREMATCH_INTERVAL_S)
+                continue
+            for key in self._keys:
+                if self._due.get(key, 0.0) <= time.time():
+                    try:
+                        self._cycle(key)
+                    except Exception:
+                        # Fehler außerhalb des Jobs (_save/_record, Dateisystem) dürfen den Thread nicht beenden
+                        app.logger.exception("prematch: Zyklus für '%s' fehlgeschlagen", key or "default")
+                        self._due[key] = time.time() + PREMATCH_INTERVAL_S
+            time.sleep(max(1.0, min(self._due.values(), default=time.time()) - time.time()))
+
+    def _cycle(self, key: str) -> None:
+        prev = self.state(key)
+        full = prev is None or prev.get("snap") is None or prev["cycles_since_full"] + 1 >= PREMATCH_FULL_EVERY
+        used = self._requests_last_hour()
+        if prev is not None and used + prev.get("requests_full" if full else "requests_delta", 0) > PREMATCH_MAX_REQUESTS_PER_H:
+            if full and prev.get("snap") is not None and used + prev.get("requests_delta", 0) <= PREMATCH_MAX_REQUESTS_PER_H:
+                full = False    # Voll-Refresh verschieben, Delta passt noch ins Budget
+            else:
+                self._due[key] = time.time() + PREMATCH_INTERVAL_S
+                self._record(key, prev, {"at": time.time(), "mode": "skipped", "reason": "request_budget"})
+                return
+        diag = _new_diag(); diag["event"] = f"prematch:{key or 'default'}"
+        t0 = time.monotonic()
+        try:
+            st = SCHEDULER.run(diag["event"], self._cycle_job, key, prev, full, diag=diag)
+        except Exception as e:
+            self._due[key] = time.time() + PREMATCH_INTERVAL_S
+            self._record(key, prev, {"at": time.time(), "mode": "error", "error": f"{type(e).__name__}: {e}"})
+            return
+        busy = max(0.0, time.monotonic() - t0 - diag.get("queued_ms", 0.0) / 1000)
+        cpu = diag.get("cpu_s", 0.0)
+        requests_made = diag.get("http", {}).get("requests", 0)
+        self._requests.append((time.time(), requests_made))
+        self._due[key] = time.time() + max(PREMATCH_INTERVAL_S, cpu / PREMATCH_CPU_SHARE)
+        st["next_due"] = self._due[key]
+        st["last_error"] = None
+        st["history"][-1].update(busy_ms=round(busy * 1000, 1), cpu_ms=round(cpu * 1000, 1), requests=requests_made)
+        # Zähler nach dem tatsächlichen Zyklus wählen (st["mode"] erbt bei "unchanged" den Vorgänger)
+        st["requests_full" if st["history"][-1]["mode"] == "full" else "requests_delta"] = requests_made
+        self._save(key, st)
+
+    def _record(self, key: str, prev: Optional[Dict[str, Any]], entry: Dict[str, Any]) -> None:
+        st = dict(prev or {"snap": None, "history": [], "cycles_since_full": 0})
+        st["history"] = (list(st["history"]) + [entry])[-PREMATCH_HISTORY:]
+        st["last_error"] = entry.get("error")
+        st["next_due"] = self._due.get(key, 0.0)
+        self._save(key, st)
+
+    def _cycle_job(self, key: str, prev: Optional[Dict[str, Any]], full: bool, *,
+                   diag: Dict[str, Any]) -> Dict[str, Any]:
+        cpu0 = time.thread_time()
+        try:
+            return self._cycle_body(key, prev, full, diag)
+        finally:
+            diag["cpu_s"] = time.thread_time() - cpu0
+
+    def _cycle_body(self, key: str, prev: Optional[Dict[str, Any]], full: bool,
+                    diag: Dict[str, Any]) -> Dict[str, Any]:
+        config_id = key or None
+        fetched_at = time.time()
+        changed: Optional[List[str]] = None
+        run_id = None
+        snap = None
+        reused = False
+        if not full:
+            old: Snapshot = prev["snap"]
+            cfg_now = load_matching_config(config_id, diag=diag)
+            workshops = load_workshops(diag=diag)
+            same_cfg = all(cfg_now.get(k) == old.cfg.get(k) for k in ("config_id", "num_wishes", "num_assign"))
+            if same_cfg and set(workshops) == set(old.workshops):
+                cfg = prev["cfg"]
+                participants, changed = load_participant_delta(
+                    old.participants, int(old.cfg["num_wishes"]),
+                    int(prev["fetched_at"]) - PREMATCH_DELTA_OVERLAP_S, diag=diag)
+                deltas = {wid: w.capacity - old.workshops[wid].capacity for wid, w in workshops.items()
+                          if w.capacity != old.workshops[wid].capacity}
+                if not changed and not deltas:
+                    mode, snap, strategy = "unchanged", old, prev["strategy"]
+                    assignments, meta = prev["assignments"], prev["meta"]
+                else:
+                    mode, strategy = "incremental", prev["strategy"]
+                    snap = Snapshot(event=old.event, cfg=old.cfg, workshops=workshops, participants=participants)
+                    assignments, _ws, cap_per_slot, _n = repair_assignments(
+                        prev["assignments"], participants, old.workshops, cfg,
+                        capacity_deltas=deltas, reassign=changed)
+                    topk = _topk_for(cfg)
+                    summary, unfilled = _summarize_assignments(assignments, participants, workshops, cap_per_slot,
+                                                               _weights_for(cfg, topk), topk,
+                                                               int(cfg["num_assign"]), int(cfg["num_wishes"]))
+                    summary["seed"] = cfg.get("seed")
+                    summary["objective"] = (cfg.get("objective") or SERVICE_DEFAULTS["objective"]).strip()
+                    summary["bounds"] = bound_gap(summary, compute_bounds(participants, workshops, cfg))
+                    meta = {"summary": summary, "unfilled_workshops": unfilled}
+        if snap is None:
+            mode = "full"
+            snap = load_snapshot(config_id, refresh=True, diag=diag)
+            cfg = dict(snap.cfg)
+            _apply_weights_generation(cfg)
+            old_cfg = (prev or {}).get("cfg") or {}
+            same_cfg = bool(old_cfg) and ({k: v for k, v in cfg.items() if k != "seed"}
+                                          == {k: v for k, v in old_cfg.items() if k != "seed"})
+            if same_cfg and not str(cfg.get("seed") or "").strip():
+                # Ohne konfigurierten Seed den bisherigen weiterverwenden – sonst mischt jeder
+                # Voll-Lauf das vorberechnete Ergebnis neu, obwohl sich nichts geändert hat
+                cfg["seed"] = old_cfg.get("seed")
+            if same_cfg and prev.get("mode") == "full" and snap.digest == prev.get("full_digest"):
+                # Gleiche Eingabe wie der letzte Voll-Lauf (seitdem nur "unchanged") → Ergebnis übernehmen
+                reused = True
+                strategy, assignments, meta, run_id = prev["strategy"], prev["assignments"], prev["meta"], prev.get("run_id")
+            else:
+                strategy, assignments, meta = _run_strategy(snap, cfg)
+                run_id = log_run(snap, cfg, strategy, assignments, meta["summary"], meta["unfilled_workshops"]).run_id
+        summary = meta["summary"]
+        entry = {"at": fetched_at, "mode": mode, "participants": len(snap.participants),
+                 "changed": len(changed) if changed is not None else None,
+                 **({"reused": True} if reused else {}),
+                 **{k: summary.get(k) for k in WHATIF_METRICS}}
+        history = list((prev or {}).get("history", [])) + [entry]
+        return {
+            **{k: v for k, v in (prev or {}).items() if k.startswith("requests_")},
+            "key": key,
+            "config_id": cfg.get("config_id"),
+            "snap": snap,
+            "cfg": cfg,
+            "strategy": strategy,
+            "assignments": assignments,
+            "meta": meta,
+            "run_id": run_id if mode == "full" else (prev or {}).get("run_id") if mode == "unchanged" else None,
+            "mode": mode if mode != "unchanged" else prev["mode"],
+            "fetched_at": fetched_at,
+            "full_at": fetched_at if mode == "full" else prev["full_at"],
+            "full_digest": snap.digest if mode == "full" else prev.get("full_digest"),
+            "cycles_since_full": 0 if mode == "full" else prev["cycles_since_full"] + 1,
+            "history": history[-PREMATCH_HISTORY:],
+        }
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        events = []
+        for key in self._keys:
+            st = self.state(key) or {}
+            snap = st.get("snap")
+            summary = (st.get("meta") or {}).get("summary") or {}
+            events.append({
+                "key": key or "default",
+                "config_id": st.get("config_id"),
+                "mode": st.get("mode"),
+                "run_id": st.get("run_id"),
+                "age_s": round(now - st["fetched_at"], 1) if st.get("fetched_at") else None,
+                "full_age_s": round(now - st["full_at"], 1) if st.get("full_at") else None,
+                "next_due_in_s": round(st["next_due"] - now, 1) if st.get("next_due") else None,
+                "participants": len(snap.participants) if snap is not None else None,
+                "metrics": {k: summary.get(k) for k in WHATIF_METRICS} if summary else None,
+                "last_error": st.get("last_error"),
+                "history": st.get("history", []),
+            })
+        return {
+            "leader": self._leader_fh is not None,
+            "pid": os.getpid(),
+            "interval_s": PREMATCH_INTERVAL_S,
+            "full_every": PREMATCH_FULL_EVERY,
+            "cpu_share": PREMATCH_CPU_SHARE,
+            "max_requests_per_h": PREMATCH_MAX_REQUESTS_PER_H,
+            "requests_last_h": self._requests_last_hour() if self._leader_fh is not None else None,
+            "events": events,
+        }
+
+PREMATCH = Prematcher(PREMATCH_CONFIGS)
 
 # --------------------------------------------------------------------------------------
 # API
 # --------------------------------------------------------------------------------------
+@app.errorhandler(NotFoundError)
+def not_found(e):
+    return jsonify({"status": "error", "error": str(e)}), 404
+
+@app.before_request
+def _start_background():
+    PREMATCH.ensure_started()
+
 @app.get("/matching/health")
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "scheduler": SCHEDULER.stats()})
 
 @app.get("/health")
 def health_root():
@@ -871,11 +2442,62 @@ def health_root():
 def root():
     return jsonify({"status": "ok", "hint": "use /matching/stats or POST /matching/dry-run"})
 
+def _request_body() -> Dict[str, Any]:
+    try:
+        body = request.get_json(silent=True) or {}
+    except Exception:
+        body = {}
+    return body if isinstance(body, dict) else {}
+
+def _request_config_id(body: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Event-/Config-Scope: Body `config_id` oder Query `?config=` (UUID oder nid)."""
+    cid = (body or {}).get("config_id") or request.args.get("config_id") or request.args.get("config")
+    return str(cid).strip() if cid not in (None, "") else None
+
+def _request_refresh(body: Optional[Dict[str, Any]] = None) -> bool:
+    v = (body or {}).get("refresh", request.args.get("refresh"))
+    return str(v).lower() in ("1", "true", "yes") if v is not None else False
+
+def _diag_out(diag: Dict[str, Any]) -> Dict[str, Any]:
+    return {"root": diag.get("root"),
+            "effective_limit": diag.get("effective_limit"),
+            "retries": diag.get("retries", 0),
+            "last_error": diag.get("last_error"),
+            "event": diag.get("event"),
+            "snapshot": diag.get("snapshot"),
+            "http": diag.get("http"),
+            "backoff_s": diag.get("backoff_s", 0.0),
+            "page_tuning": diag.get("page_tuning"),
+            "queued_ms": diag.get("queued_ms"),
+            "input_digest": diag.get("input_digest"),
+            "result_digest": diag.get("result_digest"),
+            **({"profile": diag["profile"]} if "profile" in diag else {}),
+            **({"prematch": diag["prematch"]} if "prematch" in diag else {})}
+
+@app.get("/matching/configs")
+def configs():
+    diag = _new_diag()
+    return jsonify({"status": "ok", "configs": list_matching_configs(diag=diag)})
+
+def _prematch_diag(warm: Dict[str, Any]) -> Dict[str, Any]:
+    return {"mode": warm["mode"], "age_s": round(time.time() - warm["fetched_at"], 1),
+            "full_age_s": round(time.time() - warm["full_at"], 1)}
+
+def _stats_job(config_id: Optional[str], refresh: bool, *, diag: Dict[str, Any]) -> Snapshot:
+    warm = PREMATCH.warm(config_id) if not refresh else None
+    if warm is not None:
+        diag["snapshot"] = {"cached": True, "age_s": round(time.time() - warm["fetched_at"], 2)}
+        diag["prematch"] = _prematch_diag(warm)
+        return warm["snap"]
+    return load_snapshot(config_id, refresh=refresh, diag=diag)
+
 @app.get("/matching/stats")
 def stats():
-    cfg = load_matching_config()
-    workshops = load_workshops()
-    participants = load_participants_and_wishes(cfg["num_wishes"])
+    config_id = _request_config_id()
+    diag = _new_diag(); diag["event"] = config_id or "default"
+    # Billig (Snapshot aus Cache bzw. Fetch) → direkt im Request-Thread, nicht hinter Rechenläufen im Scheduler
+    snap = _stats_job(config_id, _request_refresh(), diag=diag)
+    cfg, workshops, participants = snap.cfg, snap.workshops, snap.participants
 
     cap_fields_counter = Counter((w.capacity_field_used or "UNDETECTED") for w in workshops.values())
     topk = cfg["num_assign"] if cfg.get("topk_equals_slots", True) else min(cfg["num_assign"], cfg["num_wishes"])
@@ -894,23 +2516,45 @@ def stats():
     return jsonify({
         "status": "ok",
         "published_only": PUBLISHED_ONLY,
-        "config": {"num_assign": cfg["num_assign"], "num_wishes": cfg["num_wishes"]},
+        "config": {"num_assign": cfg["num_assign"], "num_wishes": cfg["num_wishes"],
+                   "config_id": cfg.get("config_id"), "config_title": cfg.get("config_title")},
         "counts": {"teilnehmer_seen": len(participants), "workshops": len(workshops)},
         "wishes_per_participant_histogram": dict(wishes_hist),
         "capacity_fields_used_histogram": dict(cap_fields_counter),
         "popularity_topk_preview": pop_preview,
         "capacity_preview": capacity_preview,
+        "diag": _diag_out(diag),
     })
 
-def _collect_body_overrides() -> Dict[str, Any]:
-    try:
-        body = request.get_json(silent=True) or {}
-    except Exception:
-        body = {}
+def _precheck_job(config_id: Optional[str], overrides: Dict[str, Any], refresh: bool, *, diag: Dict[str, Any]):
+    snap = load_snapshot(config_id, num_wishes=overrides.get("num_wishes"), refresh=refresh, diag=diag)
+    cfg = dict(snap.cfg)
+    cfg.update(overrides or {})
+    t0 = time.perf_counter()
+    result = compute_bounds(snap.participants, snap.workshops, cfg)
+    result["compute_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return cfg, result
+
+@app.get("/matching/precheck")
+def precheck():
+    """
+    Machbarkeit & Schranken vor einem Lauf: Kapazität vs. Bedarf pro Slot, zu kurze
+    Wunschlisten, überbuchte Workshops/Hall-Defizite, obere Schranken für happy_mean
+    und min_user_happy. Overrides (num_assign, weights, …) als Query wie beim Stream.
+    """
+    config_id = _request_config_id()
+    overrides = _query_overrides()
+    diag = _new_diag(); diag["event"] = config_id or "default"
+    cfg, result = SCHEDULER.run(diag["event"], _precheck_job, config_id, overrides, _request_refresh(), diag=diag)
+    return jsonify({"status": "ok", "config_id": cfg.get("config_id"), **result, "diag": _diag_out(diag)})
+
+def _collect_body_overrides(body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if body is None:
+        body = _request_body()
     allowed = {
         "strategy", "objective", "round_cap_pct", "alpha_fairness", "seeds", "seed",
         "weights", "weights_mode", "weights_base", "linear_min",
-        "num_assign", "num_wishes", "topk_equals_slots"
+        "num_assign", "num_wishes", "topk_equals_slots", "stop_at_bound", "prune_seeds"
     }
     return {k: v for k, v in (body or {}).items() if k in allowed and v is not None}
 
@@ -925,48 +2569,292 @@ def _apply_weights_generation(cfg: Dict[str, Any]) -> None:
             if gen:
                 cfg["weights"] = gen
 
-@app.post("/matching/dry-run")
-def dry_run():
-    cfg = load_matching_config()
-    overrides = _collect_body_overrides()
-    cfg.update(overrides or {})
-    # Auto-Weights ggf. erzeugen
-    _apply_weights_generation(cfg)
+def _run_strategy(snap: Snapshot, cfg: Dict[str, Any], *,
+                  diag: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Dict[int, str]], Dict[str, Any]]:
+    strategy = (cfg.get("strategy") or SERVICE_DEFAULTS["strategy"]).strip().lower()
+    # Seed einmal auflösen und im cfg festhalten → Log/Replay sehen denselben Wert
+    cfg["seed"] = _resolve_seed(cfg)
 
-    workshops = load_workshops()
-    participants = load_participants_and_wishes(cfg["num_wishes"])
+    def forward(ev: Dict[str, Any]) -> None:
+        emit_progress(diag, ev["event"], **{k: v for k, v in ev.items() if k != "event"})
 
-    strategy = (cfg.get("strategy") or SERVICE_DEFAULTS["strategy"]).strip().lower()
+    bounds = compute_bounds(snap.participants, snap.workshops, cfg)
     if strategy == "fair":
-        assignments, meta = run_matching_fair(participants, workshops, cfg)
+        assignments, meta = drain(iter_matching_fair(snap.participants, snap.workshops, cfg, bounds), forward)
     elif strategy == "solver":
-        assignments, meta = run_matching_solver(participants, workshops, cfg)
+        assignments, meta = drain(iter_matching_solver(snap.participants, snap.workshops, cfg), forward)
     else:
-        assignments, meta = run_matching(participants, workshops, cfg)
+        assignments, meta = run_matching(snap.participants, snap.workshops, cfg)
+    meta["summary"]["bounds"] = bound_gap(meta["summary"], bounds)
+    return strategy, assignments, meta
 
-    rows = []
-    for pid, slots in assignments.items():
-        for s, wid in sorted(slots.items()):
-            rows.append({
-                "participant_id": pid,
-                "slot": s,
-                "workshop_id": wid,
-                "workshop_title": workshops.get(wid, Workshop(wid, "?", 0)).title,
-            })
+def _dry_run_job(config_id: Optional[str], overrides: Dict[str, Any], refresh: bool, *, diag: Dict[str, Any]):
+    snap = load_snapshot(config_id, num_wishes=overrides.get("num_wishes"), refresh=refresh, diag=diag)
+    cfg = dict(snap.cfg)
+    cfg.update(overrides or {})
+    # Auto-Weights ggf. erzeugen
+    _apply_weights_generation(cfg)
+    strategy, assignments, meta = _run_strategy(snap, cfg, diag=diag)
+    rec = log_run(snap, cfg, strategy, assignments, meta["summary"], meta["unfilled_workshops"])
+    diag["run_id"] = rec.run_id
+    diag["input_digest"] = snap.digest
+    diag["result_digest"] = rec.digest
+    return snap, cfg, strategy, assignments, meta
+
+def _warm_dry_run(config_id: Optional[str], overrides: Dict[str, Any], diag: Dict[str, Any]):
+    """Vorberechnetes Ergebnis, falls vorhanden und mit denselben Parametern gerechnet."""
+    warm = PREMATCH.warm(config_id)
+    if warm is None:
+        return None
+    cfg = warm["cfg"]
+    if any(json.dumps(cfg.get(k), sort_keys=True, default=str) != json.dumps(v, sort_keys=True, default=str)
+           for k, v in overrides.items()):
+        return None
+    diag["prematch"] = _prematch_diag(warm)
+    diag["snapshot"] = {"cached": True, "age_s": round(time.time() - warm["fetched_at"], 2)}
+    if warm["mode"] == "full":
+        # Voll gerechnet → in diesem Prozess loggen, damit run_id/Replay funktionieren
+        rec = log_run(warm["snap"], cfg, warm["strategy"], warm["assignments"],
+                      warm["meta"]["summary"], warm["meta"]["unfilled_workshops"])
+        diag["run_id"], diag["result_digest"] = rec.run_id, rec.digest
+    diag["input_digest"] = warm["snap"].digest
+    return warm["snap"], cfg, warm["strategy"], warm["assignments"], warm["meta"]
+
+@app.get("/matching/prematch")
+def prematch_status():
+    if not PREMATCH_ENABLED:
+        return jsonify({"status": "ok", "enabled": False})
+    return jsonify({"status": "ok", "enabled": True, **PREMATCH.status()})
 
-    return jsonify({
+@app.post("/matching/dry-run")
+def dry_run():
+    body = _request_body()
+    config_id = _request_config_id(body)
+    overrides = _collect_body_overrides(body)
+    diag = _new_diag(); diag["event"] = config_id or "default"
+    warm = None
+    if body.get("prematch") and not _request_refresh(body) and not body.get("profile"):
+        warm = _warm_dry_run(config_id, overrides, diag)
+    job_args = (_dry_run_job, config_id, overrides, _request_refresh(body))
+    if body.get("profile"):
+        if not PROFILING_ENABLED:
+            return jsonify({"status": "error", "error": "Profiling ist deaktiviert (PROFILING_ENABLED=0)."}), 403
+        job_args = (run_profiled,) + job_args
+    if warm is not None:
+        snap, cfg, strategy, assignments, meta = warm
+    else:
+        snap, cfg, strategy, assignments, meta = SCHEDULER.run(diag["event"], *job_args, diag=diag)
+    fmt = str(body.get("format") or request.args.get("format") or "full").strip().lower()
+    payload = _result_payload(strategy, cfg, diag.get("run_id"), assignments, meta["summary"],
+                              meta["unfilled_workshops"], snap.workshops, fmt)
+    payload["diag"] = _diag_out(diag)
+    return _json_response(payload)
+
+def _result_payload(strategy: str, cfg: Dict[str, Any], run_id: Optional[str],
+                    assignments: Dict[str, Dict[int, str]], summary: Dict[str, Any],
+                    unfilled: List[Dict[str, Any]], workshops: Dict[str, Workshop], fmt: str) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
         "status": "ok",
         "mode": "dry-run",
         "strategy": strategy,
+        "config_id": cfg.get("config_id"),
+        "run_id": run_id,
+        "summary": summary,
+        "unfilled_workshops": unfilled,
+    }
+    if fmt == "columnar":
+        payload["assignments"] = _columnar_assignments(assignments, workshops)
+    else:
+        rows = []
+        by_slot: Dict[str, List[Dict[str, Any]]] = {str(s): [] for s in range(1, cfg["num_assign"] + 1)}
+        for pid, slots in assignments.items():
+            for s, wid in sorted(slots.items()):
+                w = workshops.get(wid)
+                row = {
+                    "participant_id": pid,
+                    "slot": s,
+                    "workshop_id": wid,
+                    "workshop_title": w.title if w else "?",
+                }
+                rows.append(row)
+                if str(s) in by_slot:
+                    by_slot[str(s)].append(row)
+        payload["assignments_by_slot"] = by_slot
+        payload["by_participant"] = {pid: {str(s): wid for s, wid in slots.items()} for pid, slots in assignments.items()}
+        payload["export_rows"] = rows[:2000]
+    return payload
+
+@app.get("/matching/runs/<run_id>")
+def run_result(run_id: str):
+    """Ergebnis eines geloggten Laufs (z. B. Referenz am Ende von /matching/dry-run/stream)."""
+    rec = get_run(run_id)
+    assignments, unfilled = rec.assignments, rec.unfilled
+    if assignments is None:
+        return jsonify({"status": "error", "run_id": run_id,
+                        "error": f"Ergebnis nicht mehr gespeichert (nur die letzten {RUN_RESULTS_KEEP} Läufe) – "
+                                 f"POST /matching/replay/{run_id} rechnet es neu."}), 410
+    fmt = str(request.args.get("format") or "full").strip().lower()
+    return _json_response(_result_payload(rec.strategy, rec.cfg, run_id, assignments, rec.summary,
+                                          unfilled or [], rec.snap.workshops, fmt))
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + _json_dumps(data) + b"\n\n"
+
+def _query_overrides() -> Dict[str, Any]:
+    """Overrides aus der Query (EventSource kann nur GET): Werte als JSON, sonst als String."""
+    body: Dict[str, Any] = {}
+    for k, v in request.args.items():
+        try:
+            body[k] = json.loads(v)
+        except ValueError:
+            body[k] = v
+    return _collect_body_overrides(body)
+
+@app.get("/matching/dry-run/stream")
+def dry_run_stream():
+    """
+    Dry-Run als Server-Sent Events: Fortschritt (Snapshot, Seiten pro Collection,
+    Seeds bzw. Slots mit Objective-Key und bisher bestem Lauf), am Ende eine
+    Referenz auf das Ergebnis (GET /matching/runs/<run_id>) statt des ganzen JSON.
+    """
+    config_id = _request_config_id()
+    overrides = _query_overrides()
+    diag = _new_diag(); diag["event"] = config_id or "default"
+    events: "queue.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = queue.Queue()
+    diag["on_progress"] = lambda ev, data: events.put((ev, data))
+    fut = SCHEDULER.submit(diag["event"], _dry_run_job, config_id, overrides, _request_refresh(), diag=diag)
+    fut.add_done_callback(lambda _f: events.put(None))
+
+    def stream():
+        yield _sse("start", {"event": diag["event"], "strategy": overrides.get("strategy") or SERVICE_DEFAULTS["strategy"]})
+        while True:
+            try:
+                item = events.get(timeout=SSE_KEEPALIVE_S)
+            except queue.Empty:
+                yield b": keepalive\n\n"
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
+        try:
+            _snap, cfg, strategy, _assignments, meta = fut.result()
+        except Exception as e:
+            yield _sse("error", {"status": "error", "error": str(e), "diag": _diag_out(diag)})
+            return
+        run_id = diag.get("run_id")
+        yield _sse("result", {"status": "ok", "strategy": strategy, "config_id": cfg.get("config_id"),
+                              "run_id": run_id, "result_url": f"/matching/runs/{run_id}",
+                              "summary": meta["summary"], "diag": _diag_out(diag)})
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _what_if_baseline_job(config_id: Optional[str], overrides: Dict[str, Any], refresh: bool, *, diag: Dict[str, Any]):
+    snap = load_snapshot(config_id, num_wishes=overrides.get("num_wishes"), refresh=refresh, diag=diag)
+    cfg = dict(snap.cfg)
+    cfg.update(overrides or {})
+    _apply_weights_generation(cfg)
+    strategy, assignments, summary = get_baseline(snap, cfg, overrides, diag)
+    return snap, cfg, strategy, assignments, summary
+
+def _what_if_scenarios_job(snap: 'Snapshot', cfg: Dict[str, Any], base: Dict[str, Dict[int, str]],
+                           base_summary: Dict[str, Any], scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [evaluate_what_if(snap, cfg, base, base_summary, sc) for sc in scenarios]
+
+def _what_if_scenario_error(sc: Dict[str, Any]) -> Optional[str]:
+    deltas = sc.get("capacity_deltas")
+    if deltas is not None:
+        if not isinstance(deltas, dict):
+            return "capacity_deltas: Objekt {workshop-id: ganze Zahl} erwartet."
+        for wid, d in deltas.items():
+            if isinstance(d, bool) or not isinstance(d, int):
+                return f"capacity_deltas[{wid}]: ganze Zahl erwartet."
+    remove = sc.get("remove")
+    if remove is not None and (not isinstance(remove, list)
+                               or not all(isinstance(w, (str, int)) and not isinstance(w, bool) for w in remove)):
+        return "remove: Liste von Workshop-IDs erwartet."
+    return None
+
+@app.post("/matching/what-if")
+def what_if():
+    """
+    Body: Overrides wie bei /matching/dry-run plus
+    "scenarios": [{"name": "...", "capacity_deltas": {"<workshop-id>": 5}, "remove": ["<workshop-id>"]}, ...]
+    """
+    body = _request_body()
+    scenarios = body.get("scenarios")
+    if not isinstance(scenarios, list) or not scenarios or not all(isinstance(sc, dict) for sc in scenarios):
+        return jsonify({"status": "error", "error": "scenarios: Liste von Objekten erwartet."}), 400
+    if len(scenarios) > WHATIF_MAX_SCENARIOS:
+        return jsonify({"status": "error", "error": f"Maximal {WHATIF_MAX_SCENARIOS} Szenarien pro Request."}), 400
+    for i, sc in enumerate(scenarios):
+        err = _what_if_scenario_error(sc)
+        if err:
+            return jsonify({"status": "error", "error": f"scenarios[{i}].{err}"}), 400
+
+    config_id = _request_config_id(body)
+    overrides = _collect_body_overrides(body)
+    diag = _new_diag(); diag["event"] = config_id or "default"
+    snap, cfg, strategy, base, base_summary = SCHEDULER.run(
+        diag["event"], _what_if_baseline_job, config_id, overrides, _request_refresh(body), diag=diag)
+
+    # Szenarien nacheinander in einem Job: CPU-gebunden (GIL), parallele Threads brächten nichts
+    # und würden alle MATCHING_WORKERS für dieses Event belegen
+    results = SCHEDULER.run(diag["event"], _what_if_scenarios_job, snap, cfg, base, base_summary, scenarios)
+
+    return _json_response({
+        "status": "ok",
+        "mode": "what-if",
+        "strategy": strategy,
+        "config_id": cfg.get("config_id"),
+        "baseline": {k: base_summary[k] for k in WHATIF_METRICS},
+        "scenarios": results,
+        "diag": {**_diag_out(diag), "baseline": diag.get("baseline")},
+    })
+
+@app.get("/matching/profiles/<profile_id>.pstats")
+def download_profile(profile_id: str):
+    if not PROFILING_ENABLED:
+        return jsonify({"status": "error", "error": "Profiling ist deaktiviert (PROFILING_ENABLED=0)."}), 403
+    if not profile_id.isalnum():
+        raise NotFoundError(f"Profil '{profile_id}' nicht gefunden.")
+    if not os.path.exists(os.path.join(PROFILE_DIR, f"{profile_id}.pstats")):
+        raise NotFoundError(f"Profil '{profile_id}' nicht gefunden.")
+    return send_from_directory(PROFILE_DIR, f"{profile_id}.pstats", as_attachment=True,
+                               mimetype="application/octet-stream")
+
+def _replay_job(rec: RunRecord, refetch: bool, *, diag: Dict[str, Any]):
+    snap = rec.snap
+    if refetch:
+        snap = load_snapshot(rec.cfg.get("config_id"), num_wishes=rec.cfg.get("num_wishes"), refresh=True, diag=diag)
+    cfg = dict(rec.cfg)
+    strategy, assignments, meta = _run_strategy(snap, cfg)
+    return snap, strategy, assignments, meta
+
+@app.post("/matching/replay/<run_id>")
+def replay(run_id: str):
+    """
+    Geloggten Lauf erneut ausführen (gleicher Snapshot, gleiche Parameter, gleicher Seed)
+    und das Ergebnis bitgenau vergleichen. Mit {"refetch": true} auf frischen Daten.
+    """
+    rec = get_run(run_id)
+    body = _request_body()
+    refetch = bool(body.get("refetch"))
+    diag = _new_diag(); diag["event"] = rec.snap.event
+    snap, strategy, assignments, meta = SCHEDULER.run(diag["event"], _replay_job, rec, refetch, diag=diag)
+    digest = _assignment_digest(assignments)
+    return jsonify({
+        "status": "ok",
+        "mode": "replay",
+        "run_id": run_id,
+        "strategy": strategy,
+        "seed": rec.seed,
+        "reproduced": digest == rec.digest,
+        "input_changed": snap.digest != rec.snap.digest,
+        "digest": digest,
+        "logged_digest": rec.digest,
         "summary": meta["summary"],
-        "unfilled_workshops": meta["unfilled_workshops"],
-        "assignments_by_slot": {str(s): [r for r in rows if r["slot"] == s] for s in range(1, cfg["num_assign"] + 1)},
-        "by_participant": {pid: {str(s): wid for s, wid in slots.items()} for pid, slots in assignments.items()},
-        "export_rows": rows[:2000],
-        "diag": {"root": FETCH_DIAG.get("root"),
-                 "effective_limit": FETCH_DIAG.get("effective_limit"),
-                 "retries": FETCH_DIAG.get("retries", 0),
-                 "last_error": FETCH_DIAG.get("last_error")},
+        "diag": _diag_out(diag),
     })
 
 if __name__ == "__main__":
@@ -1,12 +1,18 @@
 #!/usr/bin/env bash
 set -euo pipefail
-for f in docs/capacity/runs/*.json; do
+# optional: Glob als $1, z. B. 'docs/capacity/runs/*_matching_*.json'
+for f in ${1:-docs/capacity/runs/*.json}; do
   printf "%-60s " "$(basename "$f")"
   docker run --rm -v "$PWD":/w ghcr.io/jqlang/jq -r '
     def p95_200:
       (.metrics["latency_200_ms"].values["p(95)"] // .metrics["latency_200_ms"]["p(95)"] // "n/a");
+    def p95(name):
+      (.metrics[name].values["p(95)"] // .metrics[name]["p(95)"] // "n/a");
     def pct(name):
       (((.metrics[name].value // ((.metrics[name].passes // 0) / (.metrics.iterations.count // 1)) // 0) * 100) | round);
     "p95(200)=\(p95_200) ms | 200=\(pct("status_200"))% | 429=\(pct("status_429"))% | 5xx=\(pct("status_5xx"))%"
+    + (if .metrics["latency_stats_200_ms"] then
+         " | stats p95=\(p95("latency_stats_200_ms")) ms | dry-run p95=\(p95("latency_dryrun_200_ms")) ms"
+       else "" end)
   ' "/w/$f"
 done | sort
@@ -0,0 +1,62 @@
+#!/usr/bin/env bash
+# Lasttest Matching-Service: JSON:API-Stub + gunicorn lokal starten, k6-Mix fahren.
+# Aufruf: ./scripts/matching_capacity_run.sh [VUS] [DUR]
+#   WORKERS=2 WORKER_CLASS=sync|gthread THREADS=4 STATS_RATIO=0.7 PARTICIPANTS=300 ...
+set -euo pipefail
+VUS="${1:-5}"
+DUR="${2:-60s}"
+WORKERS="${WORKERS:-2}"                 # wie matching/Dockerfile (gunicorn -w 2)
+WORKER_CLASS="${WORKER_CLASS:-gthread}" # gthread (wie matching/Dockerfile) | sync
+THREADS="${THREADS:-4}"                 # nur gthread
+STATS_RATIO="${STATS_RATIO:-0.7}"
+REFRESH_RATIO="${REFRESH_RATIO:-0}"
+PARTICIPANTS="${PARTICIPANTS:-300}"
+WORKSHOPS="${WORKSHOPS:-12}"
+SEED="${SEED:-1}"
+STUB_LATENCY_MS="${STUB_LATENCY_MS:-0}"
+STUB_THROTTLE="${STUB_THROTTLE:-0}"
+STUB_PORT="${STUB_PORT:-8090}"
+PORT="${PORT:-5001}"
+
+TAG="matching_w${WORKERS}_${WORKER_CLASS}"
+[ "$WORKER_CLASS" = "gthread" ] && TAG="${TAG}${THREADS}"
+OUT="docs/capacity/runs/$(date -u +%Y%m%dT%H%M%SZ)_${TAG}_tn${PARTICIPANTS}_vus${VUS}_dur${DUR}.json"
+mkdir -p docs/capacity/runs
+LOGDIR="$(mktemp -d)"
+
+cleanup() { kill "${GUNI_PID:-}" "${STUB_PID:-}" 2>/dev/null || true; wait 2>/dev/null || true; }
+trap cleanup EXIT
+
+python3 scripts/matching_stub_jsonapi.py --port "$STUB_PORT" --participants "$PARTICIPANTS" \
+  --workshops "$WORKSHOPS" --seed "$SEED" --latency-ms "$STUB_LATENCY_MS" --throttle "$STUB_THROTTLE" \
+  >"$LOGDIR/stub.log" 2>&1 &
+STUB_PID=$!
+
+GUNI_ARGS=(-w "$WORKERS" -k "$WORKER_CLASS" -b "127.0.0.1:${PORT}" --timeout 300 --chdir matching)
+[ "$WORKER_CLASS" = "gthread" ] && GUNI_ARGS+=(--threads "$THREADS")
+# frisches HTTP-Cache-Verzeichnis je Lauf, sonst messen Folgeläufe nur 304er
+DRUPAL_URL="http://127.0.0.1:${STUB_PORT}/jsonapi" \
+HTTP_CACHE_DIR="$LOGDIR/http-cache" \
+MATCHING_SEED="${MATCHING_SEED:-loadtest}" \
+  gunicorn "${GUNI_ARGS[@]}" matching_server:app >"$LOGDIR/gunicorn.log" 2>&1 &
+GUNI_PID=$!
+
+for _ in $(seq 1 50); do
+  curl -fsS "http://127.0.0.1:${PORT}/health" >/dev/null 2>&1 && break
+  sleep 0.2
+done
+curl -fsS "http://127.0.0.1:${PORT}/health" >/dev/null || { cat "$LOGDIR/gunicorn.log"; exit 1; }
+
+K6_ENV=(-e BASE_URL="http://127.0.0.1:${PORT}" -e STATS_RATIO="$STATS_RATIO"
+        -e REFRESH_RATIO="$REFRESH_RATIO" -e CONFIG_IDS="${CONFIG_IDS:-1,2}" -e THINK_S="${THINK_S:-1}")
+K6_ARGS=(--vus "$VUS" --duration "$DUR"
+         --summary-trend-stats "avg,med,min,max,p(90),p(95)")
+if command -v k6 >/dev/null 2>&1; then
+  k6 run "${K6_ENV[@]}" "${K6_ARGS[@]}" --summary-export "$OUT" k6-matching.js
+else
+  docker run --rm --network host \
+    -v "$PWD":/scripts -w /scripts \
+    "${K6_ENV[@]}" \
+    grafana/k6 run "${K6_ARGS[@]}" --summary-export "/scripts/${OUT}" k6-matching.js
+fi
+echo "Wrote $OUT (Logs: $LOGDIR)"
@@ -0,0 +1,13 @@
+#!/usr/bin/env bash
+# Vergleich Worker-Anzahl × Worker-Klasse × VUs für den Matching-Service.
+# Aufruf: ./scripts/matching_capacity_sweep.sh [DUR]   (WORKER_SET, CLASS_SET, VUS_SET überschreibbar)
+set -euo pipefail
+DUR="${1:-60s}"
+for W in ${WORKER_SET:-1 2 4}; do
+  for C in ${CLASS_SET:-sync gthread}; do
+    for V in ${VUS_SET:-2 5 10 20}; do
+      WORKERS="$W" WORKER_CLASS="$C" ./scripts/matching_capacity_run.sh "$V" "$DUR"
+    done
+  done
+done
+./scripts/capacity_summarize.sh 'docs/capacity/runs/*_matching_*.json'
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Minimaler JSON:API-Stub für Lasttests des Matching-Service (nur stdlib).
+
+Liefert reproduzierbare synthetische Daten (gleicher --seed → gleiche Daten) für
+node/workshop, node/teilnehmer, node/wunsch und node/matching_config im Format,
+das der Loader in matching_server.py erwartet:
+- Paging wie Drupal: page[limit] (Server-Cap 50), page[offset], links.next
+- Filter: filter[id], filter[drupal_internal__nid], filter[status][value] (ignoriert)
+- ETag/If-None-Match → 304 (HTTP-Cache des Service greift wie gegen Drupal)
+- optional künstliche Latenz pro Seite und eine 429-Quote (Backoff-Pfad testen)
+
+Beispiel:
+    python3 scripts/matching_stub_jsonapi.py --port 8090 --participants 300 --workshops 12
+    DRUPAL_URL=http://127.0.0.1:8090/jsonapi gunicorn -w 2 -b 127.0.0.1:5001 matching_server:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+PAGE_CAP = 50                       # wie Drupal jsonapi (max. 50 pro Seite)
+ETAG_BUNDLES = ("workshop", "matching_config")
+
+
+def build_collections(participants: int, workshops: int, seed: int):
+    """Synthetische Knoten. Beliebtheit ist schief verteilt (niedrige Workshop-IDs sind begehrter)."""
+    rnd = random.Random(seed)
+    per_ws = max(1, participants // max(1, workshops))
+    ws = [{"type": "node--workshop", "id": f"ws-{i:04d}",
+           "attributes": {"title": f"Workshop {i + 1}",
+                          "field_maximale_plaetze": rnd.randint(max(1, per_ws - 5), per_ws + 8)}}
+          for i in range(workshops)]
+    tn, wu = [], []
+    for i in range(participants):
+        pid = f"tn-{i:06d}"
+        tn.append({"type": "node--teilnehmer", "id": pid,
+                   "attributes": {"field_code": f"LOAD-{i:06d}", "field_regionalverband": f"RV {i % 7}"}})
+        k = min(len(ws), rnd.choice([0, 2, 3, 5, 5, 5]))
+        pick = rnd.sample(ws, k) if k else []
+        pick.sort(key=lambda w: int(w["id"][3:]) * rnd.random())
+        wu.append({"type": "node--wunsch", "id": f"wu-{i:06d}", "attributes": {},
+                   "relationships": {"field_teilnehmer": {"data": {"type": "node--teilnehmer", "id": pid}},
+                                     "field_wuensche": {"data": [{"type": "node--workshop", "id": w["id"]}
+                                                                 for w in pick]}}})
+    cfgs = [{"type": "node--matching_config", "id": "cfg-load-1",
+             "attributes": {"drupal_internal__nid": 1, "title": "Lasttest A",
+                            "field_num_wuensche": 5, "field_num_zuteilung": 3}},
+            {"type": "node--matching_config", "id": "cfg-load-2",
+             "attributes": {"drupal_internal__nid": 2, "title": "Lasttest B",
+                            "field_num_wuensche": 3, "field_num_zuteilung": 2}}]
+    return {"workshop": ws, "teilnehmer": tn, "wunsch": wu, "matching_config": cfgs}
+
+
+def make_handler(coll, latency_ms: float, throttle: float, seed: int):
+    rnd = random.Random(seed + 1)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code: int, body: bytes = b"", headers=None):
+            self.send_response(code)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            u = urlparse(self.path)
+            qs = {k: v[0] for k, v in parse_qs(u.query).items()}
+            parts = u.path.strip("/").split("/")
+            if parts[:2] != ["jsonapi", "node"] or len(parts) != 3 or parts[2] not in coll:
+                return self._send(404, b'{"errors":[{"status":"404"}]}', {"Content-Type": "application/vnd.api+json"})
+            if throttle > 0:
+                with lock:
+                    hit = rnd.random() < throttle
+                if hit:
+                    return self._send(429, b"", {"Retry-After": "1"})
+            if latency_ms > 0:
+                time.sleep(latency_ms / 1000.0)
+
+            items = coll[parts[2]]
+            if "filter[id]" in qs:
+                items = [x for x in items if x["id"] == qs["filter[id]"]]
+            if "filter[drupal_internal__nid]" in qs:
+                nid = qs["filter[drupal_internal__nid]"]
+                items = [x for x in items if str(x["attributes"].get("drupal_internal__nid")) == nid]
+            limit = max(1, min(PAGE_CAP, int(qs.get("page[limit]", PAGE_CAP))))
+            offset = max(0, int(qs.get("page[offset]", 0)))
+            base = f"http://{self.headers.get('Host')}{u.path}"
+            q = dict(qs, **{"page[limit]": str(limit)})
+            links = {"self": {"href": base + "?" + urlencode(dict(q, **{"page[offset]": str(offset)}))}}
+            if offset + limit < len(items):
+                links["next"] = {"href": base + "?" + urlencode(dict(q, **{"page[offset]": str(offset + limit)}))}
+            body = json.dumps({"jsonapi": {"version": "1.0"}, "data": items[offset:offset + limit],
+                               "links": links}).encode()
+            etag = '"%08x"' % zlib.crc32(body)
+            if parts[2] in ETAG_BUNDLES and self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", {"ETag": etag})
+            self._send(200, body, {"Content-Type": "application/vnd.api+json", "ETag": etag})
+
+    return Handler
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="JSON:API-Stub mit synthetischen Daten für Matching-Lasttests")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8090)
+    ap.add_argument("--participants", type=int, default=300)
+    ap.add_argument("--workshops", type=int, default=12)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="künstliche Latenz pro Seite")
+    ap.add_argument("--throttle", type=float, default=0.0, help="Anteil 429-Antworten (0..1)")
+    args = ap.parse_args()
+
+    coll = build_collections(args.participants, args.workshops, args.seed)
+    srv = ThreadingHTTPServer((args.host, args.port),
+                              make_handler(coll, args.latency_ms, args.throttle, args.seed))
+    srv.daemon_threads = True
+    print(f"stub: http://{args.host}:{args.port}/jsonapi "
+          f"({args.participants} TN, {args.workshops} Workshops, seed={args.seed})", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()